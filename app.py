@@ -1,64 +1,72 @@
 import gradio as gr 
-import os 
-import subprocess 
-import sys 
+import json 
+import queue 
+import time 
 
-LOG_FILE = "system_logs.txt" 
-current_process = None 
+from bot_worker import BotWorker, LogBuffer, LOG_MAX_LINES, LOG_FLUSH_MS, LOG_FLUSH_LINES 
 
-def get_logs(): 
-    if os.path.exists(LOG_FILE): 
-        with open(LOG_FILE, "r", encoding="utf-8") as f: 
-            return f.read() 
-    return "لا توجد سجلات بعد..." 
+# عملية بوت واحدة دائمة (نماذج ومتصفح جاهزين) بدل تشغيل main.py من الصفر مع كل ضغطة 
+worker = BotWorker() 
+
+# السيرفر يرسل السطور الجديدة فقط (JSON في خانة مخفية) والمتصفح يضيفها للسجل المعروض 
+LOG_APPEND_JS = """(delta, current) => { 
+    if (!delta) return current; 
+    const d = JSON.parse(delta); 
+    const lines = (d.reset || !current ? [] : current.split("\\n")).concat(d.lines); 
+    return lines.slice(-%d).join("\\n"); 
+}""" % LOG_MAX_LINES 
 
 def run_bot(m_title, m_trailer, m_overview): 
-    global current_process 
-    
-    # 1. تجهيز بيئة العمل الأساسية 
-    env = os.environ.copy() 
-    env["FORCE_POST"] = "true" 
-    env["PYTHONUNBUFFERED"] = "1" 
-    
-    # 2. تحديد نوع التشغيل (آلي أو يدوي) 
+    # 1. تحديد نوع التشغيل (آلي أو يدوي) كمعاملات للمهمة بدل متغيرات البيئة 
+    manual = None 
     if m_title and m_title.strip() != "": 
-        env["MANUAL_MODE"] = "true" 
-        env["MANUAL_TITLE"] = m_title 
-        env["MANUAL_TRAILER"] = m_trailer 
-        env["MANUAL_OVERVIEW"] = m_overview 
-    else: 
-        env["MANUAL_MODE"] = "false" 
+        manual = {"title": m_title.strip(), "trailer_url": m_trailer, "overview": m_overview} 
 
-    # 3. إعدادات ثابتة (عشان نتجنب أي إيرور من الواجهة) 
-    env["VOICE_MODEL"] = "ar-EG-ShakirNeural" 
-    env["VOICE_SPEED"] = "-10" 
-    env["POST_TELEGRAM"] = "True" 
+    # 2. إرسال المهمة للعامل وقراءة السجلات أول بأول 
+    logs = LogBuffer() 
+    logs.append("🚀 جاري بدء تشغيل البوت...") 
+    job_id, events = worker.submit(manual=manual, force_post=True) 
+    sent = 0 
 
-    # 4. تشغيل المكنة 
-    os.system("playwright install chromium") 
-    
-    with open(LOG_FILE, "w", encoding="utf-8") as f: 
-        f.write("🚀 جاري بدء تشغيل البوت...\n") 
-        
-    current_process = subprocess.Popen( 
-        [sys.executable, "main.py"], 
-        env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1 
-    ) 
-    
-    # قراءة السجلات سطر بسطر 
-    logs = "" 
-    for line in iter(current_process.stdout.readline, ''): 
-        logs += line 
-        yield logs, gr.update() 
-        
-    current_process.wait() 
-    
-    # جلب الفيديو لو خلص 
-    vid_path = "output/final_reel.mp4" 
-    if os.path.exists(vid_path): 
-        yield logs + "\n✅ تمت العملية بنجاح!", gr.update(value=vid_path) 
+    def delta(): 
+        # السطور الجديدة فقط منذ آخر تحديث (offset يزيد دائماً فكل دفعة قيمة مختلفة) 
+        nonlocal sent 
+        lines, end = logs.since(sent) 
+        payload = {"job": job_id, "offset": end, "reset": sent == 0, "lines": lines} 
+        sent = end 
+        return json.dumps(payload, ensure_ascii=False) 
+
+    # تحديث الواجهة على دفعات (كل LOG_FLUSH_MS أو LOG_FLUSH_LINES سطر) بدل تحديث مع كل سطر 
+    interval = LOG_FLUSH_MS / 1000 
+    pending, last_flush = 1, 0.0 
+    while True: 
+        try: 
+            event = events.get(timeout=max(last_flush + interval - time.monotonic(), 0.01) if pending else None) 
+        except queue.Empty: 
+            event = None 
+        if event is not None: 
+            if event["type"] == "done": 
+                break 
+            if event["type"] == "queued": 
+                logs.append(f"⏳ المهمة #{job_id} في الانتظار ({event['ahead']} قبلها)...") 
+                pending += 1 
+            elif event["type"] == "log": 
+                logs.append(event["line"]) 
+                pending += 1 
+        if pending and (pending >= LOG_FLUSH_LINES or time.monotonic() - last_flush >= interval): 
+            yield delta(), gr.update() 
+            pending, last_flush = 0, time.monotonic() 
+
+    # 3. جلب الفيديو لو خلص 
+    if event.get("crashed"): 
+        logs.append(f"❌ توقف العامل بشكل غير متوقع (كود {event['exit_code']})، سيتم تشغيله من جديد مع المهمة القادمة.") 
+        yield delta(), gr.update() 
+    elif event.get("video"): 
+        logs.append("✅ تمت العملية بنجاح!") 
+        yield delta(), gr.update(value=event["video"]) 
     else: 
-        yield logs + "\n❌ انتهت العملية ولكن لم يتم العثور على فيديو.", gr.update() 
+        logs.append("❌ انتهت العملية ولكن لم يتم العثور على فيديو.") 
+        yield delta(), gr.update() 
 
 
 # ===================================================================== 
@@ -78,15 +86,25 @@ with gr.Blocks(title="Cinema Social Bot") as demo:
     
     # المخرجات 
     log_output = gr.Textbox(label="سجل العمليات (Logs)", lines=15) 
+    log_delta = gr.Textbox(visible=False)  # دفعات السطور الجديدة فقط 
     video_output = gr.Video(label="الفيديو النهائي") 
 
     # ربط الزر بالدالة 
     run_btn.click( 
         fn=run_bot, 
         inputs=[movie_title, movie_trailer, movie_overview], 
-        outputs=[log_output, video_output], 
+        outputs=[log_delta, video_output], 
         api_name=False # إغلاق الـ API لمنع الـ Schema builder من فحص الكود 
     ) 
+    # إضافة الدفعة للسجل في المتصفح (بدون رجوع للسيرفر) 
+    log_delta.change( 
+        fn=None, 
+        inputs=[log_delta, log_output], 
+        outputs=[log_output], 
+        js=LOG_APPEND_JS, 
+        api_name=False 
+    ) 
 
 if __name__ == "__main__": 
+    worker.start()  # تسخين العامل (تثبيت Chromium وتحميل النماذج) قبل أول ضغطة 
     demo.launch(server_name="0.0.0.0", server_port=7860, show_api=False)
@@ -0,0 +1,435 @@
+"""
+Offline render benchmark.
+
+Generates synthetic trailer / viral / voiceover inputs with FFmpeg (testsrc2 + sine), runs each
+render stage in its own process and reports wall time (total, import and stage), frames/sec,
+peak RSS (process tree, including FFmpeg children) and output size as JSON.
+
+    python benchmark.py --duration 10 --output bench.json
+    python benchmark.py --compare bench.json          # exit code 1 on regression (or any failed stage)
+    python benchmark.py --stages whisper:tiny whisper:tiny-int8 whisper:base whisper:base-int8
+
+Whisper stages report real-time factor and word error rate on short Arabic/English samples
+(synthesised with Edge-TTS from the reference texts below, so they need network access).
+"""
+import os
+import sys
+import json
+import re
+import time
+import shutil
+import platform
+import asyncio
+import argparse
+import subprocess
+import multiprocessing
+
+import psutil
+
+BENCH_DIR = os.path.join("temp", "bench")
+FPS = 30
+DEFAULT_STAGES = [
+    "startup", "auto_crop_black_bars", "apply_anti_copyright", "get_smart_thumbnail", "ken_burns",
+    "create_reel:moviepy", "create_reel:ffmpeg", "create_reel:compositor", "tts_text",
+]
+WHISPER_STAGES = ["whisper:tiny", "whisper:tiny-int8", "whisper:base", "whisper:base-int8"]
+# Stages that need none of the synthetic media (its FFmpeg generation is skipped when only these run)
+NO_MEDIA_STAGES = {"startup", "tts_text"}
+# Relative slack before a change counts as a regression
+DEFAULT_TOLERANCE = 0.15
+# Cold `import main` budget: an early exit (not this server's turn) must not pay for the heavy stack
+STARTUP_BUDGET_S = float(os.environ.get("STARTUP_BUDGET_S", "1.0"))
+# Absolute WER increase that counts as an accuracy regression
+WER_TOLERANCE = 0.05
+
+# clean_text_for_tts timing inputs (expected outputs are pinned in tests/test_tts_text.py)
+TTS_SAMPLES = [
+    'قِصَّتُنَا الْيَوْم عَنْ فيلم أكشن ، المقدم 2024.',
+    'في عام 1973 كان المستوى الأمني مختلفاً، والنمر يراقب الممر.',
+    '**القصة:** شاب يكتشف أصل عائلته في الليلة الأخرى - مع 10 أصدقاء!',
+    'لِمُشَاهَدَتِ الْفِيلْمِ كَامِلًا وَبِدُونِ إعلانات ، مُشَاهَدَةٌ مُمْتِعَةٌ.',
+    'مزارعٌ بسيط يعيش في الريف 😀 ويحلم بالسفر إلى الشمس',
+    'النّور يسطع على النمر والنهر الكبير',
+    '  "الأكشن"   #رعب   \'مستوي اخرى\' ؟ ',
+]
+
+# Whisper samples: reference text + Edge-TTS voice
+WHISPER_SAMPLES = [
+    {"lang": "ar", "voice": "ar-EG-ShakirNeural",
+     "text": "قصتنا اليوم عن فيلم أكشن مثير تدور أحداثه في مدينة كبيرة لا تنام"},
+    {"lang": "ar", "voice": "ar-EG-SalmaNeural",
+     "text": "يكتشف البطل سرا خطيرا عن عائلته ويقرر أن يواجه الجميع وحده"},
+    {"lang": "en", "voice": "en-US-GuyNeural",
+     "text": "In a city that never sleeps, one detective has twenty four hours to stop the heist."},
+    {"lang": "en", "voice": "en-GB-SoniaNeural",
+     "text": "She thought the house was empty, until the lights turned on by themselves."},
+]
+
+
+# --- Synthetic Inputs ---
+
+def _ffmpeg(*args):
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", *args], check=True, capture_output=True)
+
+
+def make_inputs(duration, workdir=BENCH_DIR):
+    """Creates a letterboxed 16:9 trailer, a vertical viral clip, a poster and a voiceover track."""
+    os.makedirs(workdir, exist_ok=True)
+    inputs = {
+        "trailer": os.path.join(workdir, "trailer.mp4"),
+        "viral": os.path.join(workdir, "viral.mp4"),
+        "poster": os.path.join(workdir, "poster.jpg"),
+        "backdrop": os.path.join(workdir, "backdrop.jpg"),
+        "voiceover": os.path.join(workdir, "voiceover.wav"),
+    }
+    # 1920x800 scope picture padded to 1920x1080 -> exercises black bar detection
+    _ffmpeg("-f", "lavfi", "-i", f"testsrc2=size=1920x800:rate=24:duration={duration}",
+            "-vf", "pad=1920:1080:0:140:black", "-c:v", "libx264", "-preset", "ultrafast",
+            "-pix_fmt", "yuv420p", inputs["trailer"])
+    # Shorter than the voiceover -> exercises looping
+    _ffmpeg("-f", "lavfi", "-i", f"testsrc2=size=720x1280:rate=30:duration={max(duration / 2, 1)}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", inputs["viral"])
+    _ffmpeg("-f", "lavfi", "-i", "testsrc2=size=1000x1500", "-frames:v", "1", inputs["poster"])
+    _ffmpeg("-f", "lavfi", "-i", "testsrc2=size=1920x1080", "-frames:v", "1", inputs["backdrop"])
+    _ffmpeg("-f", "lavfi", "-i", f"sine=frequency=220:duration={duration}", "-ar", "24000", "-ac", "1", inputs["voiceover"])
+    return inputs
+
+
+def make_speech_samples(workdir=BENCH_DIR):
+    """Synthesises the Whisper samples with Edge-TTS (MP3). Returns WHISPER_SAMPLES entries plus "path"."""
+    import edge_tts
+    os.makedirs(workdir, exist_ok=True)
+    samples = [{**sample, "path": os.path.join(workdir, f"speech_{i}_{sample['lang']}.mp3")}
+               for i, sample in enumerate(WHISPER_SAMPLES)]
+
+    async def _synthesize():
+        for sample in samples:
+            await edge_tts.Communicate(sample["text"], sample["voice"]).save(sample["path"])
+
+    asyncio.run(_synthesize())
+    return samples
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance / reference length (lowercased; punctuation, Harakat and Hamza forms normalised)."""
+    def words(text):
+        text = re.sub(r'[\u064B-\u0652\u0640]', '', text.lower())
+        text = re.sub(r'[\u0622\u0623\u0625]', '\u0627', text)
+        return re.findall(r'\w+', text)
+
+    ref, hyp = words(reference), words(hypothesis)
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i]
+        for j, h in enumerate(hyp, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h)))
+        prev = cur
+    return prev[-1] / max(len(ref), 1)
+
+
+# --- Stages (run inside a child process) ---
+
+def _stage_auto_crop(inputs, duration, out_dir):
+    from moviepy import VideoFileClip
+    from main import auto_crop_black_bars
+    clip = VideoFileClip(inputs["trailer"])
+    cropped = auto_crop_black_bars(clip)
+    frames = 0
+    for _ in cropped.iter_frames(fps=FPS):
+        frames += 1
+    clip.close()
+    return {"frames": frames, "cropped_size": list(cropped.size)}
+
+
+def _stage_anti_copyright(inputs, duration, out_dir):
+    from moviepy import VideoFileClip
+    from main import apply_anti_copyright
+    clip = VideoFileClip(inputs["viral"])
+    processed = apply_anti_copyright(clip, (1080, 768))
+    frames = 0
+    for _ in processed.iter_frames(fps=FPS):
+        frames += 1
+    clip.close()
+    return {"frames": frames}
+
+
+def _stage_smart_thumbnail(inputs, duration, out_dir):
+    import cv2
+    from main import get_smart_thumbnail
+    decoded = 0
+
+    class _CountingCapture(cv2.VideoCapture):
+        """Counts the frames get_smart_thumbnail actually decodes (failed seeks/reads are not frames)."""
+        def read(self, *args):
+            nonlocal decoded
+            ret, frame = super().read(*args)
+            decoded += bool(ret)
+            return ret, frame
+
+    capture, cv2.VideoCapture = cv2.VideoCapture, _CountingCapture
+    try:
+        path = get_smart_thumbnail(inputs["trailer"])
+    finally:
+        cv2.VideoCapture = capture
+    if not path:
+        raise RuntimeError("get_smart_thumbnail returned None")
+    moved = os.path.join(out_dir, os.path.basename(path))
+    shutil.move(path, moved)
+    return {"frames": decoded, "output": moved}
+
+
+def _stage_ken_burns(inputs, duration, out_dir):
+    from render_engine import render_ken_burns
+    output_path = render_ken_burns([inputs["poster"], inputs["backdrop"]], duration,
+                                   os.path.join(out_dir, "slideshow.mp4"))
+    if not output_path:
+        raise RuntimeError("render_ken_burns returned None")
+    return {"frames": int(round(duration * FPS)), "output": output_path}
+
+
+def parse_importtime(stderr):
+    """[(indented module name, cumulative us)] from `python -X importtime` output."""
+    # "import time: self [us] | cumulative | imported package"
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((parts[2].rstrip(), int(parts[1])))
+    return rows
+
+
+def _stage_startup(inputs, duration, out_dir, runs=3):
+    """Cold `python -X importtime -c "import main"` in fresh interpreters; fails above STARTUP_BUDGET_S."""
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                              capture_output=True, text=True, check=True)
+        rows = parse_importtime(proc.stderr)
+        total = next(us for name, us in rows if name.strip() == "main")
+        if best is None or total < best[0]:
+            best = (total, rows)
+    total, rows = best
+    # Direct imports of main are indented one level ("|   name")
+    direct = [(name.strip(), us) for name, us in rows if len(name) - len(name.lstrip()) == 3]
+    top_level = sorted(direct, key=lambda row: row[1], reverse=True)[:5]
+    import_s = total / 1e6
+    if import_s > STARTUP_BUDGET_S:
+        raise RuntimeError(f"import main took {import_s:.2f}s (budget {STARTUP_BUDGET_S}s), top: {top_level}")
+    return {"import_main_s": round(import_s, 3), "slowest_imports": {name: round(us / 1e6, 3) for name, us in top_level}}
+
+
+def _stage_tts_text(inputs, duration, out_dir, rounds=200):
+    """Micro-benchmark of the TTS text rewriter (cold, cache cleared)."""
+    from main import clean_text_for_tts
+    start = time.perf_counter()
+    for _ in range(rounds):
+        clean_text_for_tts.cache_clear()
+        for text in TTS_SAMPLES:
+            clean_text_for_tts(text)
+    calls = rounds * len(TTS_SAMPLES)
+    return {"calls": calls, "us_per_call": round((time.perf_counter() - start) / calls * 1e6, 2)}
+
+
+def _stage_create_reel(inputs, duration, out_dir, backend):
+    from main import create_reel
+    output_path = os.path.join(out_dir, f"reel_{backend}.mp4")
+    result = create_reel(inputs["trailer"], inputs["voiceover"], [], output_path,
+                         poster_path=None, backend=backend, viral_path=inputs["viral"])
+    if not result:
+        raise RuntimeError(f"create_reel ({backend}) returned None")
+    return {"frames": int(round(duration * FPS)), "output": result}
+
+
+def _stage_whisper(inputs, duration, out_dir, setting):
+    """Load time, real-time factor and per-language WER of one Whisper setting ("tiny", "base-int8", ...)."""
+    import whisper_models
+    from transcription import decode_audio, SAMPLE_RATE
+    size, _, variant = setting.partition("-")
+    start = time.perf_counter()
+    model = whisper_models.get_model(size, int8=variant == "int8")
+    load_s = time.perf_counter() - start
+    audio_s = infer_s = 0.0
+    errors = {}
+    for sample in inputs["speech"]:
+        audio = decode_audio(sample["path"])
+        start = time.perf_counter()
+        result = model.transcribe(audio, language=sample["lang"], fp16=False)
+        infer_s += time.perf_counter() - start
+        audio_s += len(audio) / SAMPLE_RATE
+        errors.setdefault(sample["lang"], []).append(word_error_rate(sample["text"], result["text"]))
+    return {"load_s": round(load_s, 3), "audio_s": round(audio_s, 2), "rtf": round(infer_s / audio_s, 3),
+            "wer": {lang: round(sum(v) / len(v), 3) for lang, v in errors.items()}}
+
+
+def _run_stage(name, inputs, duration, out_dir):
+    if name.startswith("create_reel:"):
+        return _stage_create_reel(inputs, duration, out_dir, name.split(":", 1)[1])
+    if name.startswith("whisper:"):
+        return _stage_whisper(inputs, duration, out_dir, name.split(":", 1)[1])
+    return {
+        "auto_crop_black_bars": _stage_auto_crop,
+        "apply_anti_copyright": _stage_anti_copyright,
+        "get_smart_thumbnail": _stage_smart_thumbnail,
+        "ken_burns": _stage_ken_burns,
+        "tts_text": _stage_tts_text,
+        "startup": _stage_startup,
+    }[name](inputs, duration, out_dir)
+
+
+def _stage_worker(name, inputs, duration, out_dir, queue):
+    # stdout carries the JSON report: send this child's output (main's Rich log, FFmpeg) to stderr instead
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    try:
+        start = time.perf_counter()
+        import main  # noqa: F401  (heavy imports are timed separately from the stage itself)
+        import_s = time.perf_counter() - start
+        start = time.perf_counter()
+        result = _run_stage(name, inputs, duration, out_dir)
+        queue.put({"ok": True, "import_s": round(import_s, 3), "stage_s": round(time.perf_counter() - start, 3), **result})
+    except Exception as e:
+        queue.put({"ok": False, "error": str(e)})
+
+
+# --- Measurement ---
+
+def _tree_rss(proc):
+    """RSS of a process plus all of its descendants (FFmpeg encoders, segment workers)."""
+    total = 0
+    try:
+        for p in [proc] + proc.children(recursive=True):
+            try:
+                total += p.memory_info().rss
+            except psutil.Error:
+                pass
+    except psutil.Error:
+        pass
+    return total
+
+
+def measure_stage(name, inputs, duration, out_dir, interval=0.05):
+    """Runs one stage in a fresh process and samples its process tree RSS until it exits."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    worker = ctx.Process(target=_stage_worker, args=(name, inputs, duration, out_dir, queue))
+    start = time.perf_counter()
+    worker.start()
+    proc = psutil.Process(worker.pid)
+    peak = 0
+    while worker.is_alive():
+        peak = max(peak, _tree_rss(proc))
+        worker.join(interval)
+    wall = time.perf_counter() - start
+    result = queue.get() if not queue.empty() else {"ok": False, "error": f"exit code {worker.exitcode}"}
+
+    report = {
+        "ok": result.pop("ok"),
+        "wall_s": round(wall, 3),
+        "peak_rss_mb": round(peak / 2**20, 1),
+    }
+    frames = result.get("frames")
+    if frames and result.get("stage_s"):
+        report["frames"] = frames
+        report["fps"] = round(frames / result["stage_s"], 2)
+    output = result.get("output")
+    if output and os.path.exists(output):
+        report["output_bytes"] = os.path.getsize(output)
+    report.update({k: v for k, v in result.items() if k not in ("frames", "output")})
+    return report
+
+
+def run_benchmark(duration=10.0, stages=None):
+    stages = stages or DEFAULT_STAGES
+    inputs = {}
+    if any(name not in NO_MEDIA_STAGES and not name.startswith("whisper:") for name in stages):
+        inputs.update(make_inputs(duration))
+    if any(name.startswith("whisper:") for name in stages):
+        inputs["speech"] = make_speech_samples()
+    out_dir = os.path.join(BENCH_DIR, "out")
+    os.makedirs(out_dir, exist_ok=True)
+    results = {}
+    for name in stages:
+        print(f"[bench] {name}...", file=sys.stderr)
+        results[name] = measure_stage(name, inputs, duration, out_dir)
+        print(f"[bench] {name}: {json.dumps(results[name])}", file=sys.stderr)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duration_s": duration,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "render_segments": os.environ.get("RENDER_SEGMENTS", "1"),
+        },
+        "stages": results,
+    }
+
+
+# --- Baseline Comparison ---
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Returns a list of regression messages (fps / wall time / RTF / WER / peak RSS beyond tolerance, new failures)."""
+    regressions = []
+    for name, base in baseline.get("stages", {}).items():
+        cur = current["stages"].get(name)
+        if cur is None:
+            continue
+        if base.get("ok") and not cur.get("ok"):
+            regressions.append(f"{name}: failed ({cur.get('error')})")
+            continue
+        if base.get("fps") and cur.get("fps") and cur["fps"] < base["fps"] * (1 - tolerance):
+            regressions.append(f"{name}: fps {base['fps']} -> {cur['fps']}")
+        elif base.get("import_main_s") and cur.get("import_main_s", 0) > base["import_main_s"] * (1 + tolerance):
+            regressions.append(f"{name}: import main {base['import_main_s']}s -> {cur['import_main_s']}s")
+        elif base.get("stage_s") and cur.get("stage_s", 0) > base["stage_s"] * (1 + tolerance):
+            regressions.append(f"{name}: stage time {base['stage_s']}s -> {cur['stage_s']}s")
+        if base.get("rtf") and cur.get("rtf", 0) > base["rtf"] * (1 + tolerance):
+            regressions.append(f"{name}: real-time factor {base['rtf']} -> {cur['rtf']}")
+        for lang, wer in base.get("wer", {}).items():
+            if cur.get("wer", {}).get(lang, 0) > wer + WER_TOLERANCE:
+                regressions.append(f"{name}: WER ({lang}) {wer} -> {cur['wer'][lang]}")
+        if base.get("peak_rss_mb") and cur.get("peak_rss_mb", 0) > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{name}: peak RSS {base['peak_rss_mb']}MB -> {cur['peak_rss_mb']}MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline render benchmark (synthetic inputs, no network).")
+    parser.add_argument("--duration", type=float, default=10.0, help="Voiceover length in seconds")
+    parser.add_argument("--stages", nargs="+", default=None, help=f"Subset of: {' '.join(DEFAULT_STAGES + WHISPER_STAGES)}")
+    parser.add_argument("--output", help="Write the JSON report here (stdout otherwise)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Baseline JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--keep", action="store_true", help="Keep generated inputs/outputs in temp/bench")
+    args = parser.parse_args(argv)
+
+    try:
+        report = run_benchmark(args.duration, args.stages)
+    finally:
+        if not args.keep:
+            shutil.rmtree(BENCH_DIR, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+    failed = {name: stage.get("error") for name, stage in report["stages"].items() if not stage["ok"]}
+    for name, error in failed.items():
+        print(f"[FAILED] {name}: {error}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for msg in regressions:
+            print(f"[REGRESSION] {msg}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("[bench] No regressions against baseline.", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
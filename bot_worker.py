@@ -0,0 +1,208 @@
+import os
+import io
+import sys
+import json
+import queue
+import asyncio
+import itertools
+import collections
+import threading
+import subprocess
+import traceback
+
+# Long-lived bot process for the Gradio app: main.py is imported once and every job reuses the warm
+# interpreter (Whisper registry, Supabase client, Playwright install), instead of one `python main.py` per click.
+# Protocol: the app writes one JSON job per line to the worker's stdin; the worker answers with JSON event
+# lines on stdout ({"type": "ready" | "start" | "log" | "done", "job": id, ...}).
+WORKER_ENV = {
+    "VOICE_MODEL": "ar-EG-ShakirNeural",
+    "VOICE_SPEED": "-10",
+    "POST_TELEGRAM": "True",
+    "PYTHONUNBUFFERED": "1",
+}
+OUTPUT_VIDEO = os.path.join("output", "final_reel.mp4")
+# Dashboard log streaming: bounded history, and UI updates batched on a time/size cadence
+LOG_MAX_LINES = int(os.environ.get("LOG_MAX_LINES", "2000"))
+LOG_FLUSH_MS = int(os.environ.get("LOG_FLUSH_MS", "250"))
+LOG_FLUSH_LINES = int(os.environ.get("LOG_FLUSH_LINES", "200"))
+
+
+# ---------------------------------------------------------------------------
+# Worker side (runs as `python bot_worker.py`)
+# ---------------------------------------------------------------------------
+
+class _EventStream(io.TextIOBase):
+    """Line-buffered text stream that forwards every complete line as a "log" event of the current job."""
+
+    def __init__(self, emit):
+        self._emit = emit
+        self._buffer = ""
+        self.job = None
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+    def write(self, text):
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._emit({"type": "log", "job": self.job, "line": line + "\n"})
+        return len(text)
+
+    def flush(self):
+        if self._buffer:
+            self._emit({"type": "log", "job": self.job, "line": self._buffer})
+            self._buffer = ""
+
+
+def _run_job(main, job):
+    """Runs one cycle and returns its exit code; SystemExit from main.py ends the job, not the worker."""
+    try:
+        asyncio.run(main.run_one_cycle(force_post=job.get("force_post", True), manual=job.get("manual")))
+        return 0
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+        return 1
+
+
+def serve():
+    # Protocol lines go to a private copy of stdout; fd 1 itself is pointed at stderr so output from
+    # child processes (ffmpeg, playwright) cannot corrupt the event stream
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    os.dup2(2, 1)
+    lock = threading.Lock()
+
+    def emit(event):
+        with lock:
+            protocol.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    stream = _EventStream(emit)
+    sys.stdout = sys.stderr = stream
+
+    # One-time setup, paid at worker start instead of on every click
+    try:
+        subprocess.run(["playwright", "install", "chromium"], stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    except OSError as e:
+        print(f"playwright install skipped: {e}")
+    import main
+    import whisper_models
+    if whisper_models.WHISPER_PRELOAD:
+        whisper_models.preload(main.TRANSCRIPTION_MODEL, int8=main.TRANSCRIPTION_INT8)
+    stream.flush()
+    emit({"type": "ready", "job": None})
+
+    for raw in sys.__stdin__:
+        if not raw.strip():
+            continue
+        job = json.loads(raw)
+        stream.job = job["id"]
+        emit({"type": "start", "job": job["id"]})
+        code = _run_job(main, job)
+        stream.flush()
+        video = OUTPUT_VIDEO if os.path.exists(OUTPUT_VIDEO) else None
+        emit({"type": "done", "job": job["id"], "exit_code": code, "video": video})
+        stream.job = None
+
+
+# ---------------------------------------------------------------------------
+# App side
+# ---------------------------------------------------------------------------
+
+class LogBuffer:
+    """
+    Ring buffer of the last max_lines log lines with absolute offsets: readers keep the offset they have
+    seen and fetch only newer lines.
+    """
+
+    def __init__(self, max_lines=LOG_MAX_LINES):
+        self._lines = collections.deque(maxlen=max_lines)
+        self._end = 0  # Offset just past the newest line
+        self._lock = threading.Lock()
+
+    def append(self, line):
+        text = line.rstrip("\r\n")
+        if "\r" in text:
+            text = text.rsplit("\r", 1)[-1]  # Progress bars redraw with \r: keep the final state only
+        with self._lock:
+            self._lines.append(text)
+            self._end += 1
+
+    def since(self, offset=0):
+        """Returns (lines newer than offset, new offset). Lines already evicted from the ring are skipped."""
+        with self._lock:
+            start = self._end - len(self._lines)
+            skip = max(offset - start, 0)
+            return list(itertools.islice(self._lines, skip, None)), self._end
+
+
+class BotWorker:
+    """
+    Owns the worker process and its job queue. Jobs run one at a time in submission order; each
+    submitter gets its own queue of events for its job. The worker is (re)started on demand.
+    """
+
+    def __init__(self):
+        self._proc = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs = {}  # job id -> (queue.Queue of events, worker process the job was sent to)
+
+    def start(self):
+        with self._lock:
+            self._ensure_running()
+
+    def _ensure_running(self):
+        if self._proc is not None and self._proc.poll() is None:
+            return
+        env = {**os.environ, **WORKER_ENV}
+        self._proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env,
+            text=True, encoding="utf-8", bufsize=1,
+        )
+        threading.Thread(target=self._read, args=(self._proc,), name="bot-worker-reader", daemon=True).start()
+
+    def submit(self, manual=None, force_post=True):
+        """Queues a job. manual: {"title", "trailer_url", "overview"} or None. Returns (job_id, events queue)."""
+        events = queue.Queue()
+        with self._lock:
+            self._ensure_running()
+            job_id = next(self._ids)
+            if self._jobs:
+                events.put({"type": "queued", "job": job_id, "ahead": len(self._jobs)})
+            self._jobs[job_id] = (events, self._proc)
+            job = {"id": job_id, "force_post": force_post, "manual": manual}
+            self._proc.stdin.write(json.dumps(job, ensure_ascii=False) + "\n")
+            self._proc.stdin.flush()
+        return job_id, events
+
+    def _read(self, proc):
+        for raw in proc.stdout:
+            try:
+                event = json.loads(raw)
+            except ValueError:
+                continue
+            with self._lock:
+                events, _ = self._jobs.get(event.get("job"), (None, None))
+                if event["type"] == "done":
+                    self._jobs.pop(event["job"], None)
+            if events is not None:
+                events.put(event)
+        # Worker died (crash, OOM kill): fail every job it still owed an answer. Matching on the owning
+        # process (not self._proc) still reaches them when a replacement worker was started first.
+        code = proc.wait()
+        with self._lock:
+            orphans = {job_id: events for job_id, (events, owner) in self._jobs.items() if owner is proc}
+            for job_id in orphans:
+                del self._jobs[job_id]
+        for job_id, events in orphans.items():
+            events.put({"type": "done", "job": job_id, "exit_code": code, "video": None, "crashed": True})
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,112 @@
+import os
+import atexit
+import asyncio
+import logging
+import threading
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# One headless Chromium for the whole process. Playwright objects are bound to the event loop that
+# created them, and every cycle runs under its own asyncio.run(), so the browser lives on a dedicated
+# background loop and callers hop onto it. One persistent context keeps cookies (e.g. Cloudflare
+# clearance) between page loads.
+BROWSER_MAX_PAGES = int(os.environ.get("BROWSER_MAX_PAGES", "4"))
+BROWSER_NAV_TIMEOUT_MS = int(os.environ.get("BROWSER_NAV_TIMEOUT_MS", "30000"))
+BROWSER_SETTLE_MS = int(os.environ.get("BROWSER_SETTLE_MS", "3000"))
+# Scraping only needs the DOM: skip heavy or third-party requests the page would otherwise wait on
+BROWSER_BLOCK_RESOURCES = os.environ.get("BROWSER_BLOCK_RESOURCES", "True") == "True"
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "facebook.net", "hotjar.com", "clarity.ms", "yandex.ru", "cloudflareinsights.com",
+)
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+_loop = None
+_thread = None
+_lock = threading.Lock()
+_state = {"playwright": None, "browser": None, "context": None, "pages": None}
+
+
+def _ensure_loop():
+    global _loop, _thread
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="browser-pool", daemon=True)
+            _thread.start()
+            atexit.register(close)
+        return _loop
+
+
+async def _route(route):
+    request = route.request
+    host = urlparse(request.url).hostname or ""
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(host == h or host.endswith("." + h) for h in BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def _context():
+    """Launches (or relaunches after a crash) the shared browser and context. Runs on the pool loop."""
+    browser = _state["browser"]
+    if browser is not None and browser.is_connected():
+        return _state["context"]
+    if _state["playwright"] is None:
+        from playwright.async_api import async_playwright
+        _state["playwright"] = await async_playwright().start()
+        _state["pages"] = asyncio.Semaphore(max(BROWSER_MAX_PAGES, 1))
+    browser = await _state["playwright"].chromium.launch(headless=True)
+    _state["browser"] = browser
+    context = await browser.new_context(user_agent=USER_AGENT)
+    if BROWSER_BLOCK_RESOURCES:
+        await context.route("**/*", _route)
+    _state["context"] = context
+    logger.info("Shared Chromium launched")
+    return _state["context"]
+
+
+async def _fetch_html(url, wait_selector=None):
+    context = await _context()
+    async with _state["pages"]:
+        page = await context.new_page()
+        try:
+            await page.goto(url, wait_until="networkidle", timeout=BROWSER_NAV_TIMEOUT_MS)
+            # Give late scripts a bounded moment; stop early once the element we care about is in the DOM
+            try:
+                if wait_selector:
+                    await page.wait_for_selector(wait_selector, state="attached", timeout=BROWSER_SETTLE_MS)
+                else:
+                    await page.wait_for_timeout(BROWSER_SETTLE_MS)
+            except Exception:
+                pass
+            return await page.content()
+        finally:
+            await page.close()
+
+
+async def fetch_html(url, wait_selector=None):
+    """Renders url in the shared browser and returns the final HTML (one page load, page closed afterwards)."""
+    future = asyncio.run_coroutine_threadsafe(_fetch_html(url, wait_selector), _ensure_loop())
+    return await asyncio.wrap_future(future)
+
+
+async def _close():
+    browser, playwright = _state["browser"], _state["playwright"]
+    _state.update(browser=None, context=None, playwright=None, pages=None)
+    if browser is not None:
+        await browser.close()
+    if playwright is not None:
+        await playwright.stop()
+
+
+def close():
+    """Shuts the browser down (registered with atexit once the pool has started)."""
+    if _loop is None or not _loop.is_running():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_close(), _loop).result(timeout=10)
+    except Exception as e:
+        logger.warning(f"Browser pool shutdown failed: {e}")
@@ -6,20 +6,20 @@ import random
 import re
 import time
 import asyncio
-from bs4 import BeautifulSoup
+import importlib.util
+
+import tmdb_client
 
 logger = logging.getLogger(__name__)
 
 STATE_FILE = "bot_state.json"
 BASE_URL = "https://cinma.online"
-TMDB_API_KEY = os.environ.get("TMDB_API_KEY")
-
-# Attempt to import playwright for headless scraping
-try:
-    from playwright.async_api import async_playwright
-    PLAYWRIGHT_AVAILABLE = True
-except ImportError:
-    PLAYWRIGHT_AVAILABLE = False
+# Catalog items enriched from TMDB per selection (0 = the whole fetched catalog)
+TMDB_CANDIDATES = int(os.environ.get("TMDB_CANDIDATES", "15"))
+
+# Playwright for headless scraping (presence check only; imported where a browser is actually launched)
+PLAYWRIGHT_AVAILABLE = importlib.util.find_spec("playwright") is not None
+if not PLAYWRIGHT_AVAILABLE:
     logger.warning("Playwright not installed. Scraper will use requests (might fail Cloudflare).")
 
 def get_next_content_type():
@@ -47,29 +47,7 @@ def get_next_content_type():
 
 def get_tmdb_data(title, content_type):
     """Fetches popularity and metadata from TMDB."""
-    if not TMDB_API_KEY:
-        return 0, [], "", "", "N/A"
-    
-    search_type = "movie" if content_type.lower() == "movie" else "tv"
-    url = f"https://api.themoviedb.org/3/search/{search_type}?api_key={TMDB_API_KEY}&query={title}"
-    
-    try:
-        res = requests.get(url, timeout=10).json()
-        if res.get('results'):
-            best_match = res['results'][0]
-            return (
-                best_match.get('popularity', 0),
-                best_match.get('genre_ids', []),
-                best_match.get('overview', ''),
-                best_match.get('poster_path', ''),
-                best_match.get('id', 'N/A')
-            )
-    except Exception as e:
-        logger.error(f"TMDB lookup failed for {title}: {e}")
-    
-    return 0, [], "", "", "N/A"
-
-from supabase import create_client, Client
+    return tmdb_client.search(title, content_type)
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -95,6 +73,7 @@ def scrape_cinma_online():
 
     catalog = []
     try:
+        from supabase import create_client, Client
         client: Client = create_client(SITE_SUPABASE_URL, SITE_SUPABASE_KEY)
         
         # Fetch latest movies
@@ -140,116 +119,147 @@ def scrape_cinma_online():
         # Fallback to empty list or your previous BeautifulSoup logic if you want
         return []
 
-async def extract_assets_from_page(watch_url):
-    """Scrapes a specific watch page to find the trailer URL."""
-    logger.info(f"Scraping watch page: {watch_url}")
-    html_content = ""
+# Watch pages embed the trailer as a YouTube iframe/link
+YOUTUBE_REGEX = re.compile(r'(youtube\.com/embed/|youtube\.com/watch\?v=|youtu\.be/)([a-zA-Z0-9_-]+)')
+TRAILER_SELECTOR = 'iframe[src*="youtube.com"], iframe[src*="youtu.be"]'
 
-    if PLAYWRIGHT_AVAILABLE:
-        try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                await page.goto(watch_url, wait_until="networkidle", timeout=30000)
-                await asyncio.sleep(3)
-                html_content = await page.content()
-                await browser.close()
-        except Exception as e:
-            logger.error(f"Playwright asset extraction failed: {e}")
+def _parse_trailer(soup):
+    # 1. Check iframes
+    for iframe in soup.find_all('iframe'):
+        match = YOUTUBE_REGEX.search(iframe.get('src', ''))
+        if match:
+            return f"https://www.youtube.com/watch?v={match.group(2)}"
 
-    if not html_content:
+    # 2. Check all links
+    for link in soup.find_all('a', href=True):
+        match = YOUTUBE_REGEX.search(link.get('href', ''))
+        if match:
+            return f"https://www.youtube.com/watch?v={match.group(2)}"
+    return None
+
+def _parse_overview(soup):
+    candidates = []
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    if meta_desc and meta_desc.get('content'):
+        candidates.append(meta_desc['content'])
+    og_desc = soup.find('meta', property='og:description')
+    if og_desc and og_desc.get('content'):
+        candidates.append(og_desc['content'])
+    prop_desc = soup.select('[itemprop="description"]')
+    for el in prop_desc:
+        candidates.append(el.get_text(separator=' ', strip=True))
+    def class_match(c):
         try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-            response = requests.get(watch_url, headers=headers, timeout=15)
-            html_content = response.text
-        except: pass
+            cl = ' '.join(c) if isinstance(c, list) else str(c)
+            cl = cl.lower()
+            return any(k in cl for k in ['overview', 'synopsis', 'story', 'description'])
+        except:
+            return False
+    desc_blocks = [el for el in soup.find_all(True) if class_match(el.get('class'))]
+    for el in desc_blocks:
+        candidates.append(el.get_text(separator=' ', strip=True))
+    paragraphs = soup.find_all('p')
+    for p in paragraphs:
+        text = p.get_text(separator=' ', strip=True)
+        if len(text) > 200:
+            candidates.append(text)
+    candidates = [re.sub(r'\s+', ' ', t).strip() for t in candidates if t and isinstance(t, str)]
+    if not candidates:
+        return ""
+    return max(candidates, key=len)
 
+def parse_watch_page(html_content):
+    """Extracts trailer URL, overview and poster from one DOM snapshot of a watch page."""
+    assets = {'trailer_url': None, 'overview': "", 'poster_url': None}
     if not html_content:
-        return None
-
+        return assets
     try:
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(html_content, 'lxml')
-        youtube_regex = re.compile(r'(youtube\.com/embed/|youtube\.com/watch\?v=|youtu\.be/)([a-zA-Z0-9_-]+)')
-        
-        # 1. Check iframes
-        iframes = soup.find_all('iframe')
-        for iframe in iframes:
-            src = iframe.get('src', '')
-            match = youtube_regex.search(src)
-            if match:
-                return f"https://www.youtube.com/watch?v={match.group(2)}"
-        
-        # 2. Check all links
-        all_links = soup.find_all('a', href=True)
-        for link in all_links:
-            href = link.get('href', '')
-            match = youtube_regex.search(href)
-            if match:
-                return f"https://www.youtube.com/watch?v={match.group(2)}"
-            
-        return None
+        assets['trailer_url'] = _parse_trailer(soup)
+        assets['overview'] = _parse_overview(soup)
+        og_image = soup.find('meta', property='og:image')
+        if og_image and og_image.get('content'):
+            assets['poster_url'] = og_image['content']
     except Exception as e:
-        logger.error(f"Asset extraction failed: {e}")
-        return None
+        logger.error(f"Watch page parsing failed: {e}")
+    return assets
+
+# Markers of anti-bot interstitials that only a real browser gets past
+CHALLENGE_MARKERS = (
+    "cf-browser-verification", "challenge-platform", "cf_chl_opt", "just a moment...",
+    "attention required! | cloudflare", "g-recaptcha", "h-captcha",
+)
+SCRAPE_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+
+_http_session = None
+
+def _fetch_page(url):
+    """Plain HTTP GET over a keep-alive session. Returns (status, html); (None, "") on network errors."""
+    global _http_session
+    if _http_session is None:
+        _http_session = requests.Session()
+        _http_session.headers.update(SCRAPE_HEADERS)
+    try:
+        response = _http_session.get(url, timeout=15)
+        return response.status_code, response.text
+    except Exception as e:
+        logger.warning(f"HTTP fetch failed for {url}: {e}")
+        return None, ""
+
+def is_challenge_page(status, html_content):
+    if status in (403, 429, 503):
+        return True
+    head = html_content[:20000].lower()
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+async def extract_watch_page(watch_url):
+    """
+    Returns trailer URL, overview and poster from one load of a watch page. Plain HTTP first (the trailer
+    iframe and meta description are server-rendered); the shared browser only when the page is a
+    challenge or a needed field is missing.
+    """
+    logger.info(f"Scraping watch page: {watch_url}")
+    status, html_content = await asyncio.to_thread(_fetch_page, watch_url)
+    challenged = not html_content or is_challenge_page(status, html_content)
+    assets = parse_watch_page("" if challenged else html_content)
+    if assets['trailer_url'] and assets['overview']:
+        return assets
 
-async def extract_overview_text(watch_url):
-    logger.info(f"Scraping overview: {watch_url}")
-    html_content = ""
     if PLAYWRIGHT_AVAILABLE:
+        reason = "challenge page" if challenged else "trailer/overview missing"
+        logger.info(f"Escalating to browser ({reason}): {watch_url}")
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                await page.goto(watch_url, wait_until="networkidle", timeout=30000)
-                await asyncio.sleep(3)
-                html_content = await page.content()
-                await browser.close()
+            import browser_pool
+            rendered = parse_watch_page(await browser_pool.fetch_html(watch_url, wait_selector=TRAILER_SELECTOR))
+            assets = {key: rendered[key] or assets[key] for key in assets}
         except Exception as e:
-            logger.error(f"Playwright overview extraction failed: {e}")
-    if not html_content:
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-            response = requests.get(watch_url, headers=headers, timeout=15)
-            html_content = response.text
-        except:
-            pass
-    if not html_content:
-        return ""
-    try:
-        soup = BeautifulSoup(html_content, 'lxml')
-        candidates = []
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and meta_desc.get('content'):
-            candidates.append(meta_desc['content'])
-        og_desc = soup.find('meta', property='og:description')
-        if og_desc and og_desc.get('content'):
-            candidates.append(og_desc['content'])
-        prop_desc = soup.select('[itemprop="description"]')
-        for el in prop_desc:
-            candidates.append(el.get_text(separator=' ', strip=True))
-        def class_match(c):
-            try:
-                cl = ' '.join(c) if isinstance(c, list) else str(c)
-                cl = cl.lower()
-                return any(k in cl for k in ['overview', 'synopsis', 'story', 'description'])
-            except:
-                return False
-        desc_blocks = [el for el in soup.find_all(True) if class_match(el.get('class'))]
-        for el in desc_blocks:
-            candidates.append(el.get_text(separator=' ', strip=True))
-        paragraphs = soup.find_all('p')
-        for p in paragraphs:
-            text = p.get_text(separator=' ', strip=True)
-            if len(text) > 200:
-                candidates.append(text)
-        candidates = [re.sub(r'\s+', ' ', t).strip() for t in candidates if t and isinstance(t, str)]
-        if not candidates:
-            return ""
-        longest = max(candidates, key=len)
-        return longest
-    except Exception as e:
-        logger.error(f"Overview extraction failed: {e}")
-        return ""
+            logger.error(f"Playwright page load failed: {e}")
+    return assets
+
+async def extract_assets_from_page(watch_url):
+    """Scrapes a specific watch page to find the trailer URL."""
+    return (await extract_watch_page(watch_url))['trailer_url']
+
+async def extract_overview_text(watch_url):
+    return (await extract_watch_page(watch_url))['overview']
+
+async def manual_content(title, trailer_url=None, overview=None, content_type="Movie"):
+    """Builds a select_best_content()-shaped item for a manually requested title (TMDB-enriched)."""
+    pop, genres, tmdb_overview, tmdb_poster, tmdb_id = get_tmdb_data(title, content_type)
+    return {
+        'id': None,  # Not a catalog row: no catalog bookkeeping for manual posts
+        'Title': title,
+        'Type': content_type,
+        'Watch_URL': None,  # Resolved from Supabase by the caller
+        'Poster_URL': f"https://image.tmdb.org/t/p/w500{tmdb_poster}" if tmdb_poster else None,
+        'popularity_score': pop,
+        'overview': overview or tmdb_overview,
+        'tmdb_id': tmdb_id,
+        'genre_ids': genres,
+        'Trailer_URL': trailer_url or None,
+    }
+
 async def select_best_content():
     """Dynamically scrapes, enriches, and selects content."""
     catalog = scrape_cinma_online()
@@ -286,12 +296,12 @@ async def select_best_content():
         logger.warning(f"No {target_type} found. Falling back.")
         filtered_items = catalog
 
-    # Enrich with TMDB
+    # Enrich with TMDB: all candidates concurrently over the pooled session, results in catalog order
     results = []
-    # Limit to top 15 items for better variety and scoring
-    for item in filtered_items[:15]:
+    candidates = filtered_items[:TMDB_CANDIDATES] if TMDB_CANDIDATES > 0 else filtered_items
+    enriched = await tmdb_client.search_many([(item['title'], item['type']) for item in candidates])
+    for item, (pop, genres, overview, tmdb_poster, tmdb_id) in zip(candidates, enriched):
         title = item['title']
-        pop, genres, overview, tmdb_poster, tmdb_id = get_tmdb_data(title, item['type'])
         
         # High Retention Genre Scoring (Retention Rate Optimization)
         # 878: Sci-Fi, 35: Comedy, 18: Drama, 9648: Mystery, 53: Thriller
@@ -316,6 +326,7 @@ async def select_best_content():
                 break # Only one boost for keywords
             
         results.append({
+            'id': item.get('id'),
             'Title': title,
             'Type': item['type'],
             'Watch_URL': item['watch_url'],
@@ -334,11 +345,14 @@ async def select_best_content():
     top_n = min(len(results), 3)
     selected = random.choice(results[:top_n])
     
-    # Finally, try to get the trailer directly from the site
-    trailer_url = await extract_assets_from_page(selected['Watch_URL'])
+    # Finally, get the trailer and overview directly from the site (one page load for both)
+    assets = await extract_watch_page(selected['Watch_URL'])
+    trailer_url = assets['trailer_url']
     selected['Trailer_URL'] = trailer_url
+    if not selected.get('Poster_URL'):
+        selected['Poster_URL'] = assets['poster_url']
     
-    page_overview = await extract_overview_text(selected['Watch_URL'])
+    page_overview = assets['overview']
     if page_overview and len(page_overview) > len(selected.get('overview', '')):
         selected['overview'] = page_overview
     else:
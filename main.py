@@ -78,8 +78,13 @@ import traceback
 import logging
 import shutil
 import subprocess
+import io
+import wave
+import functools
 import gc
-import cv2
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -125,6 +130,7 @@ def get_progress_manager():
 
 def download_with_rich(ydl_opts, urls):
     """Helper to run yt-dlp with Rich progress bar."""
+    import yt_dlp
     with get_progress_manager() as progress:
         task_id = progress.add_task("Starting...", filename="Init", total=100)
         
@@ -146,39 +152,15 @@ def download_with_rich(ydl_opts, urls):
             ydl.download(urls)
 
 
-from content_manager import select_best_content
 from dotenv import load_dotenv
-import edge_tts
-import yt_dlp
-import numpy as np
-from youtube_downloader import download_video
-from PIL import Image, ImageDraw, ImageFont
-from supabase import create_client, Client
-from google import genai
-from google.genai import types
-
-# MoviePy Imports
-from moviepy import (
-    VideoFileClip, AudioFileClip, TextClip, CompositeVideoClip, 
-    concatenate_videoclips, ImageClip, concatenate_audioclips, 
-    AudioArrayClip, ColorClip
-)
-import moviepy.video.fx as vfx
-from moviepy.audio.AudioClip import CompositeAudioClip
-import moviepy.audio.fx as afx
-import imageio_ffmpeg
-import whisper
-import torch
-
-# Whisper (Lazy Import)
-whisper = None
-
-def get_whisper():
-    global whisper
-    if whisper is None:
-        import whisper as _whisper
-        whisper = _whisper
-    return whisper
+from youtube_downloader import download_video, extract_youtube_id
+import tts_cache
+import whisper_models
+import transcript_cache
+
+# Heavy dependencies (torch/whisper, moviepy, cv2/numpy, PIL, edge_tts, yt_dlp, supabase, google-genai,
+# playwright via content_manager, render_engine) are imported at their first use site: a cycle that
+# exits early on check_server_turn() should not pay for them. See `benchmark.py --stages startup`.
 
 # -----------------------------------------------------------------------------
 # LOCKED CONFIGURATION
@@ -204,8 +186,15 @@ FB_PAGE_TOKEN = os.environ.get("FB_PAGE_TOKEN")
 FB_PAGE_ID = os.environ.get("FB_PAGE_ID")
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
-# Initialize Supabase
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+# Supabase client (created on first use)
+_supabase = None
+
+def get_supabase():
+    global _supabase
+    if _supabase is None and SUPABASE_URL and SUPABASE_KEY:
+        from supabase import create_client
+        _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _supabase
 
 OUTPUT_DIR = "output"
 TEMP_DIR = "temp"
@@ -226,6 +215,24 @@ DEBUG_SHORT_VIDEO = False       # Force 5-second video for testing
 ENABLE_VIDEO_GENERATION = True  # ENABLED
 SIMULATION_MODE = False         # PRODUCTION MODE: ENABLE UPLOAD
 
+# Render Backend: "moviepy" (default), "ffmpeg" (single-pass filtergraph) or
+# "compositor" (OpenCV into a preallocated buffer, raw pipe to FFmpeg). Native backends fall back to MoviePy.
+RENDER_BACKEND = os.environ.get("RENDER_BACKEND", "moviepy").lower()
+# Parallel segmented rendering for the MoviePy backend (1 = single serial render)
+RENDER_SEGMENTS = int(os.environ.get("RENDER_SEGMENTS", "1"))
+# Edge-TTS: segments synthesised concurrently (bounded), each attempt with a timeout
+TTS_CONCURRENCY = int(os.environ.get("TTS_CONCURRENCY", "4"))
+TTS_TIMEOUT = 30
+TTS_RETRIES = 3
+TTS_SAMPLE_RATE = 24000  # Edge-TTS native rate (audio-24khz-*-mono-mp3)
+# Burn word-timed subtitles (ASS track via libass) into the reel
+BURN_SUBTITLES = os.environ.get("BURN_SUBTITLES", "True") == "True"
+# Whisper size for trailer transcription (cached per YouTube video ID + model in cache/transcripts.db)
+TRANSCRIPTION_MODEL = "base"
+# Opt-in dynamic int8 Whisper inference, per call site (compare with `benchmark.py --stages whisper:...`)
+TRANSCRIPTION_INT8 = os.environ.get("TRANSCRIPTION_INT8", "False") == "True"
+TIMESTAMPS_INT8 = os.environ.get("TIMESTAMPS_INT8", "False") == "True"
+
 # Email Configuration
 ALERT_EMAIL = os.environ.get("ALERT_EMAIL")
 ALERT_EMAIL_PASSWORD = os.environ.get("ALERT_EMAIL_PASSWORD")
@@ -336,6 +343,7 @@ def get_watch_url_from_supabase(movie_title: str) -> str:
             error_msg = "Supabase credentials missing."
             raise ValueError(error_msg)
         
+        from supabase import create_client, Client
         client: Client = create_client(SITE_SUPABASE_URL, SITE_SUPABASE_KEY)
         
         # Helper to process result
@@ -444,6 +452,7 @@ else:
 
 def get_movie():
     """Fetches the latest movie from Supabase with poster URL."""
+    supabase = get_supabase()
     if not supabase:
         logger.error("Supabase client not initialized.")
         return None, None, None
@@ -480,10 +489,11 @@ def get_trending_content():
     if not TMDB_API_KEY:
         raise ValueError("TMDB_API_KEY not found.")
         
-    url = f"https://api.themoviedb.org/3/trending/all/day?api_key={TMDB_API_KEY}"
-    response = requests.get(url, timeout=10)
-    response.raise_for_status()
-    results = response.json().get("results", [])
+    import tmdb_client
+    data = tmdb_client.get_json("/trending/all/day", timeout=10)
+    if data is None:
+        raise Exception("TMDB trending request failed.")
+    results = data.get("results", [])
     
     if not results:
         raise Exception("No trending content found.")
@@ -551,19 +561,17 @@ def get_thumbnail(tmdb_id, title):
         
     # 2. Fallback to TMDB (Poster & Metadata)
     try:
-        # Fetch with Arabic language preference
-        url = f"https://api.themoviedb.org/3/movie/{tmdb_id}?api_key={TMDB_API_KEY}&language=ar-SA"
-        res = requests.get(url, timeout=15)
-        if res.status_code == 200:
-            data = res.json()
+        # Fetch with Arabic language preference (cached: details rarely change)
+        import tmdb_client
+        data = tmdb_client.get_json(f"/movie/{tmdb_id}", {"language": "ar-SA"}, timeout=15)
+        if data is not None:
             
             # Fetch Arabic Overview
             overview = data.get('overview')
             if not overview:
                 # Fallback to English if Arabic is missing
                 logger.warning(f"Arabic overview missing for {tmdb_id}, trying English.")
-                en_url = f"https://api.themoviedb.org/3/movie/{tmdb_id}?api_key={TMDB_API_KEY}"
-                en_data = requests.get(en_url, timeout=10).json()
+                en_data = tmdb_client.get_json(f"/movie/{tmdb_id}", timeout=10) or {}
                 overview = en_data.get('overview')
 
             # Fetch High-Res Poster if thumb_path doesn't exist yet
@@ -579,10 +587,32 @@ def get_thumbnail(tmdb_id, title):
         
     return thumb_path if os.path.exists(thumb_path) else None, overview
 
+def get_backdrops(tmdb_id, media_type="movie", limit=4):
+    """Downloads the top-voted TMDB backdrops for the Ken Burns slideshow fallback."""
+    # Catalog types are "Movie"/"Series" (lowercased by the caller); everything that is not a movie is TV
+    media = "movie" if media_type.lower() == "movie" else "tv"
+    paths = []
+    try:
+        import tmdb_client
+        data = tmdb_client.get_json(f"/{media}/{tmdb_id}/images", {"include_image_language": "null,en,ar"}, timeout=15)
+        if data is None:
+            logger.warning(f"TMDB backdrops request failed for ID {tmdb_id}")
+            return paths
+        backdrops = sorted(data.get('backdrops', []), key=lambda b: b.get('vote_average', 0), reverse=True)
+        for i, backdrop in enumerate(backdrops[:limit]):
+            dest = os.path.join(TEMP_DIR, f"backdrop_{tmdb_id}_{i}.jpg")
+            if download_file_with_retry(f"https://image.tmdb.org/t/p/w1280{backdrop['file_path']}", dest):
+                paths.append(dest)
+    except Exception as e:
+        logger.error(f"TMDB backdrops failed for ID {tmdb_id}: {e}")
+    return paths
+
 def generate_script(title, overview, media_type="movie", genre_ar="الدراما", trailer_text="", max_duration=None):
     """
     Generates the script using Gemini with Hierarchical logic (Primary: Plot, Secondary: Trailer).
     """
+    from google import genai
+    from google.genai import types
     logger.info(f"Generating script for {media_type} '{title}' ({genre_ar})...")
     if not GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY not found.")
@@ -651,82 +681,191 @@ def generate_script(title, overview, media_type="movie", genre_ar="الدرام
 INTRO_TEMPLATE = "قِصَّتُنَا الْيَوْم عَنْ {content_type} {genres} ، {title}."
 OUTRO_TEXT = "لِمُشَاهَدَتِ الْفِيلْمِ كَامِلًا وَبِدُونِ إِعْلَانات [PAUSE_SHORT] سَتَجِدُ الرَّابِطَ فِي أَوَّلِ تَعْلِيقٍ [PAUSE] ، مُشَاهَدَةٌ مُمْتِعَةٌ."
 
+# --- TTS Text Rewriter ---
+# Declarative pronunciation rules, listed in the order the original sequential passes applied them.
+# They are compiled once into a single alternation and applied in one left-to-right pass.
+NUMBER_WORDS = {
+    "1967": "أَلْفٍ وَتُسْعُمِائَةٍ وَسَبْعَةٍ وَسِتُّون",
+    "1973": "أَلْفٍ وَتُسْعُمِائَةٍ وَثَلَاثَةٍ وَسَبْعُون",
+    "2023": "أَلْفَيْنِ وَثَلَاثَةٍ وَعِشْرُون",
+    "2024": "أَلْفَيْنِ وَأَرْبَعَةٍ وَعِشْرُون",
+    "2025": "أَلْفَيْنِ وَخَمْسَةٍ وَعِشْرُون",
+    "2026": "أَلْفَيْنِ وَسِتَّةٍ وَعِشْرُون",
+    "1": "وَاحِد", "2": "اِثْنَان", "3": "ثَلَاثَة", "4": "أَرْبَعَة", "5": "خَمْسَة",
+    "6": "سِتَّة", "7": "سَبْعَة", "8": "ثَمَانِيَة", "9": "تِسْعَة", "10": "عَشَرَة"
+}
+# General pronunciation fixes (before the final-Noon and Lam rules)
+TTS_WORD_FIXES = [
+    ("المقدم", "الْمُقَدَّم"),
+    ("أصل", "أَصْل"),
+    ("أكشن", "أَكْشَن"),  # "الأكشن" gets its Sukun from the lunar rule
+    ("إعلانات", "إِعْلَانات"),  # Hamza with Kasra, Fatha on the Alif before Taa
+    ("عٌ", "ع"),  # Drop Tanwin Damma on Ain (e.g. "مُزَارِعٌ")
+]
+# Specific Movie/Genre fixes (after the Lam rules, so "الممر" is already "الْممر" and never matches;
+# "النمر" only survives when the text already has a Shadda on a solar Noon)
+TTS_TERM_FIXES = [
+    ("النمر", "النِّمر"),
+    ("مستوى", "مُسْتَوَى"), ("مستوي", "مُسْتَوَى"),
+    ("اخرى", "أُخْرَى"), ("أخرى", "أُخْرَى"),
+]
+LUNAR_LETTERS = "أبجحخعغفقكموهي"
+SOLAR_LETTERS = "تثدذر_سشصضطظلن"
+SHADDA, SUKUN, FATHA = "ّ", "ْ", "َ"
+# Dropped by the final clean-up: markdown, quotes, emoji, anything outside word/Arabic/punctuation
+TTS_DROP_CHARS = r'[^\w\s\u0600-\u06FF\.\,\!\?\،\؛]'
+
+_NUMBER_REGEX = r'\b(?:' + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r')\b'  # "10" before "1"
+_NOON_CONTEXT = re.compile(r'\s|[\.\!\?،؛]|$')
+_SOLAR_SHADDA = re.compile(f"ال([{SOLAR_LETTERS}]){SHADDA}")
+_WHITESPACE = re.compile(r'\s')
+
+
+def _compile_tts_rules():
+    """Builds the combined pattern (one named group per rule, earlier passes first) and its replacements."""
+    rules, replacements = [("num", _NUMBER_REGEX)], {}
+    # A word fix running straight into a term fix ("المقدمستوى"): the term fix reuses the letter just emitted
+    for i, (word, word_repl) in enumerate(TTS_WORD_FIXES):
+        for j, (term, term_repl) in enumerate(TTS_TERM_FIXES):
+            if word[-1] == word_repl[-1] == term[0]:
+                rules.append((f"chain{i}_{j}", re.escape(word + term[1:])))
+                replacements[f"chain{i}_{j}"] = word_repl[:-1] + term_repl
+    for group, table in (("word", TTS_WORD_FIXES), ("term", TTS_TERM_FIXES)):
+        for i, (src, repl) in enumerate(table):
+            rules.append((f"{group}{i}", re.escape(src)))
+            replacements[f"{group}{i}"] = repl
+    rules += [
+        ("lunar", f"ال(?=[{LUNAR_LETTERS}])"),
+        ("solar", f"ال[{SOLAR_LETTERS}]"),
+        ("noon", r"ن(?=\s|[\.\!\?،؛]|$)"),
+        ("space", r"(?:\s|" + TTS_DROP_CHARS + r")+"),
+    ]
+    return re.compile("|".join(f"(?P<{name}>{regex})" for name, regex in rules)), replacements
+
+
+_TTS_PATTERN, _TTS_REPLACEMENTS = _compile_tts_rules()
+_NUMBER_PATTERN = re.compile(_NUMBER_REGEX)
+
+
 def convert_numbers_to_text(text):
     """Replaces common numbers with Arabic text for better TTS pronunciation."""
-    # Simple dictionary for common numbers and years
-    number_map = {
-        "1967": "أَلْفٍ وَتُسْعُمِائَةٍ وَسَبْعَةٍ وَسِتُّون",
-        "1973": "أَلْفٍ وَتُسْعُمِائَةٍ وَثَلَاثَةٍ وَسَبْعُون",
-        "2023": "أَلْفَيْنِ وَثَلَاثَةٍ وَعِشْرُون",
-        "2024": "أَلْفَيْنِ وَأَرْبَعَةٍ وَعِشْرُون",
-        "2025": "أَلْفَيْنِ وَخَمْسَةٍ وَعِشْرُون",
-        "2026": "أَلْفَيْنِ وَسِتَّةٍ وَعِشْرُون",
-        "1": "وَاحِد", "2": "اِثْنَان", "3": "ثَلَاثَة", "4": "أَرْبَعَة", "5": "خَمْسَة",
-        "6": "سِتَّة", "7": "سَبْعَة", "8": "ثَمَانِيَة", "9": "تِسْعَة", "10": "عَشَرَة"
-    }
-    
-    # Sort keys by length descending to replace "10" before "1"
-    for num_str in sorted(number_map.keys(), key=len, reverse=True):
-        # Use word boundaries to avoid replacing parts of words/numbers
-        pattern = r'\b' + num_str + r'\b'
-        text = re.sub(pattern, number_map[num_str], text)
-    
-    return text
+    return _NUMBER_PATTERN.sub(lambda m: NUMBER_WORDS[m.group()], text)
+
 
+@functools.lru_cache(maxsize=1024)
 def clean_text_for_tts(text):
-    """Cleans text for Edge-TTS with phonetic and pronunciation logic."""
-    # 1. Convert numbers to text first
-    text = convert_numbers_to_text(text)
-    
-    # 2. General Pronunciation Logic (Noun/Action clarity)
-    # Fix for "المقدم" and "أكشن" and final Noon
-    text = text.replace("المقدم", "الْمُقَدَّم").replace("أصل", "أَصْل")
-    text = text.replace("أكشن", "أَكْشَن").replace("الأكشن", "الأَكْشَن")
-    
-    # User Request: Specific diacritics for "إعلانات" (Iclanat)
-    # 1. Hamza with Kasra (إِ)
-    # 2. Fatha on the Alif before Taa (نَات)
-    text = text.replace("إعلانات", "إِعْلَانات")
-    
-    # User Request: Remove diacritic from "عٌ" (Ain with Tanwin Damma)
-    # We replace it with just Ain or Ain with single Damma if preferred, 
-    # but based on "مُزَارِعٌ" request, we'll remove it entirely.
-    text = text.replace("عٌ", "ع")
-    
-    # Add Fattha to any Noon at the end of a word (General Logic)
-    # Matches a Noon (ن) at the end of a word, not followed by any diacritic
-    text = re.sub(r'ن(\s|[\.\!\?،؛]|$)', r'نَ\1', text)
-    
-    # 3. Lam Logic (Solar/Lunar)
-    # Lunar: Ensure Sukun on Lam (e.g., الْقمر)
-    lunar_letters = "أبجحخعغفقكموهي"
-    for char in lunar_letters:
-        text = text.replace(f"ال{char}", f"الْ{char}")
+    """
+    Cleans text for Edge-TTS with phonetic and pronunciation logic.
+    One left-to-right pass over the compiled rule table: numbers, word fixes, final Noon Fatha,
+    lunar Sukun / solar Shadda, term fixes and clean-up. Memoised: intro/outro segments repeat every run.
+    """
+    # Solar Shadda is skipped for any letter that already carries one somewhere in the text
+    blocked = set(_SOLAR_SHADDA.findall(text)) if SHADDA in text else ()
+
+    def rewrite(m):
+        kind, src = m.lastgroup, m.group()
+        if kind == "space":
+            return " " if _WHITESPACE.search(src) else ""
+        if kind == "lunar":
+            return "ال" + SUKUN
+        if kind == "noon":
+            return "ن" + FATHA
+        if kind.startswith(("term", "chain")):
+            # Term fixes run last: one starting with a solar "ال" only matches if the Shadda pass skipped it
+            if src[:2] == "ال" and src[2] in SOLAR_LETTERS and src[2] not in blocked:
+                return src[:3] + SHADDA + src[3:]
+            return _TTS_REPLACEMENTS[kind]
+        if kind == "solar":
+            out = src if src[2] in blocked else src + SHADDA
+        elif kind == "num":
+            out = NUMBER_WORDS[src]
+        else:
+            out = _TTS_REPLACEMENTS[kind]
+        # Fatha on a word-final Noon (that pass ran after numbers and word fixes, before the Shadda)
+        if out.rstrip(SHADDA).endswith("ن") and _NOON_CONTEXT.match(text, m.end()):
+            out += FATHA
+        return out
+
+    return _TTS_PATTERN.sub(rewrite, text).strip()
+
+def decode_audio_bytes(data, sample_rate=TTS_SAMPLE_RATE):
+    """Decodes an encoded (MP3) byte string straight to mono int16 PCM with PyAV, no temp file or ffmpeg process."""
+    import numpy as np
+    import av
+    chunks = []
+    with av.open(io.BytesIO(data)) as container:
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+        for frame in container.decode(audio=0):
+            for out in resampler.resample(frame):
+                chunks.append(out.to_ndarray().reshape(-1))
+        for out in resampler.resample(None):
+            chunks.append(out.to_ndarray().reshape(-1))
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16)
+
+def write_wav(path, pcm, sample_rate=TTS_SAMPLE_RATE):
+    """Writes mono int16 PCM as a WAV file (lossless hand-off to the render stage)."""
+    import numpy as np
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.ascontiguousarray(pcm, dtype=np.int16).tobytes())
+
+async def synthesize_segment(text, voice, rate, semaphore, label=""):
+    """
+    Synthesises one TTS segment under the shared semaphore, with per-attempt timeout and retries.
+    Returns (encoded audio bytes, word boundaries relative to the segment) streamed from Edge-TTS
+    or from the TTS cache, None on failure.
+    """
+    import edge_tts
+    key = tts_cache.cache_key(text, voice, rate)
+    cached = tts_cache.get(key)
+    if cached:
+        logger.info(f"Segment {label} served from TTS cache")
+        data, meta = cached
+        return data, (meta or {}).get("words", [])
     
-    # Solar: Ensure Shadda on the next letter (e.g., الشَّمس)
-    solar_letters = "تثدذر_سشصضطظلن"
-    for char in solar_letters:
-        # Note: We use a generic shadda if not already present
-        if f"ال{char}" in text and f"ال{char}ّ" not in text:
-            text = text.replace(f"ال{char}", f"ال{char}ّ")
-
-    # 4. Specific Movie/Genre fixes
-    text = text.replace("الممر", "الْمَمَرّ").replace("النمر", "النِّمر")
-    text = text.replace("مستوى", "مُسْتَوَى").replace("مستوي", "مُسْتَوَى")
-    text = text.replace("اخرى", "أُخْرَى").replace("أخرى", "أُخْرَى")
+    async def stream_audio():
+        try:
+            communicate = edge_tts.Communicate(text, voice, rate=rate, boundary="WordBoundary")
+        except TypeError:
+            # edge-tts < 7 has no boundary argument and always emits WordBoundary events
+            communicate = edge_tts.Communicate(text, voice, rate=rate)
+        chunks, words = [], []
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                chunks.append(chunk["data"])
+            elif chunk["type"] == "WordBoundary":
+                # Offsets are in 100ns ticks
+                start = chunk["offset"] / 1e7
+                words.append({"word": chunk["text"], "start": start, "end": start + chunk["duration"] / 1e7})
+        return b"".join(chunks), words
     
-    # 5. Clean up
-    text = text.replace('*', '').replace('#', '').replace('-', '')
-    text = text.replace('"', '').replace("'", "")
-    text = re.sub(r'[^\w\s\u0600-\u06FF\.\,\!\?\،\؛]', '', text)
-    return re.sub(r'\s+', ' ', text).strip()
-
-def create_silence(duration=0.3):
-    """Creates a silent audio clip (reduced to 0.3s to save time)."""
-    return AudioArrayClip(np.zeros((int(44100 * duration), 2)), fps=44100)
+    for attempt in range(TTS_RETRIES):
+        # The semaphore covers the request only: a backing-off segment does not hold a slot others could use
+        async with semaphore:
+            try:
+                logger.debug(f"Segment rate: {rate} for text: {text[:30]}...")
+                data, words = await asyncio.wait_for(stream_audio(), timeout=TTS_TIMEOUT)
+                if len(data) >= 100:
+                    tts_cache.put(key, data, {"words": words})
+                    return data, words
+            except asyncio.TimeoutError:
+                logger.warning(f"TTS timeout on segment {label} (attempt {attempt + 1}/{TTS_RETRIES})")
+            except Exception as e:
+                logger.warning(f"TTS Error on segment {label}: {e}")
+        if attempt + 1 < TTS_RETRIES:
+            await asyncio.sleep(1 + attempt)
+    return None
 
 async def generate_audio(text, output_file, media_type="movie", rate="-20%"):
-    """Generates audio using Microsoft Edge-TTS (ar-EG-HamdanNeural). Default rate is 0.8 speed (-20%)."""
+    """
+    Generates audio using Microsoft Edge-TTS (ar-EG-HamdanNeural). Default rate is 0.8 speed (-20%).
+    Segments are decoded in memory and joined with the pauses into one PCM buffer, written as WAV to output_file.
+    Returns (duration, words): the word timeline comes from Edge-TTS WordBoundary events and is empty
+    if any segment came back without boundaries (callers then fall back to Whisper).
+    """
+    import numpy as np
     logger.info(f"Generating audio (Microsoft Edge-TTS - Hamdan) with rate: {rate}...")
     
     # Handle PAUSE markers with custom durations
@@ -735,79 +874,90 @@ async def generate_audio(text, output_file, media_type="movie", rate="-20%"):
     # Split by any pause marker
     parts_raw = re.split(r'(\|\|PAUSE\|\||\|\|PAUSE_SHORT\|\|)', text_cleaned)
     
-    audio_clips = []
-    temp_files = []
     current_voice = "ar-EG-ShakirNeural"
     
-    try:
-        segment_counter = 0
-        for part in parts_raw:
-            if part == "||PAUSE||":
-                audio_clips.append(create_silence(0.4))
-                continue
-            if part == "||PAUSE_SHORT||":
-                audio_clips.append(create_silence(0.1))
-                continue
-                
-            clean_seg = clean_text_for_tts(part)
-            if not clean_seg: continue
-            
-            logger.info(f"Generating segment {segment_counter+1} with text: {clean_seg[:50]}...")
-            segment_counter += 1
-            temp_filename = f"{TEMP_DIR}/seg_{segment_counter}_{int(datetime.now().timestamp())}.mp3"
-            
-            # Retry Loop
-            success = False
-            for _ in range(3):
-                try:
-                    # Apply rate for the story segments (anything longer than 10 chars is likely story/outro)
-                    current_rate = rate if len(clean_seg) > 10 else "+0%"
-                    
-                    # Log the rate being used for visibility
-                    logger.debug(f"Segment rate: {current_rate} for text: {clean_seg[:30]}...")
-                    
-                    communicate = edge_tts.Communicate(clean_seg, current_voice, rate=current_rate)
-                    await communicate.save(temp_filename)
-                    if os.path.exists(temp_filename) and os.path.getsize(temp_filename) >= 100:
-                        success = True
-                        break
-                    await asyncio.sleep(1)
-                except Exception as e:
-                    logger.warning(f"TTS Error: {e}")
-                    await asyncio.sleep(1)
+    # Plan the timeline first: silences stay in place, speech segments are synthesised concurrently
+    timeline = []
+    jobs = []
+    semaphore = asyncio.Semaphore(TTS_CONCURRENCY)
+    for part in parts_raw:
+        if part == "||PAUSE||":
+            timeline.append(0.4)
+            continue
+        if part == "||PAUSE_SHORT||":
+            timeline.append(0.1)
+            continue
             
-            if success:
-                temp_files.append(temp_filename)
-                try:
-                    clip = AudioFileClip(temp_filename)
-                    if clip.duration > 0:
-                        audio_clips.append(clip)
-                except Exception as e:
-                    logger.warning(f"Audio load error: {e}")
-
-        if not audio_clips:
-            logger.error("❌ Failed to generate audio after multiple attempts.")
-            send_telegram_alert("❌ **خطأ حرج:** فشل توليد الصوت (Edge-TTS). تم إيقاف العملية.")
-            sys.exit(1) # Critical failure: Exit with code 1 as requested
-
-        final_audio = concatenate_audioclips(audio_clips)
-        final_audio.write_audiofile(output_file)
-        duration = final_audio.duration
-        final_audio.close()
-        logger.info(f"Successfully generated Edge-TTS audio ({duration:.2f}s)")
-        return duration
+        clean_seg = clean_text_for_tts(part)
+        if not clean_seg: continue
         
-    finally:
-        for f in temp_files:
-            try: os.remove(f)
-            except: pass
+        segment_number = len(jobs) + 1
+        logger.info(f"Generating segment {segment_number} with text: {clean_seg[:50]}...")
+        # Apply rate for the story segments (anything longer than 10 chars is likely story/outro)
+        current_rate = rate if len(clean_seg) > 10 else "+0%"
+        jobs.append(synthesize_segment(clean_seg, current_voice, current_rate, semaphore, label=str(segment_number)))
+        timeline.append(len(jobs) - 1)
+    
+    results = await asyncio.gather(*jobs)
+    
+    # Decode every segment to PCM, in the original order, shifting its word boundaries to the
+    # segment's position in the final timeline
+    pieces = []
+    words = []
+    words_complete = True
+    position = 0
+    for item in timeline:
+        if isinstance(item, float):
+            pieces.append(int(TTS_SAMPLE_RATE * item))  # Silence, as a sample count
+            position += pieces[-1]
+            continue
+        if not results[item]:
+            logger.warning(f"Segment {item + 1} failed after {TTS_RETRIES} attempts, skipping.")
+            continue
+        data, segment_words = results[item]
+        try:
+            pcm = decode_audio_bytes(data)
+        except Exception as e:
+            logger.warning(f"Audio decode error on segment {item + 1}: {e}")
+            continue
+        if not len(pcm):
+            continue
+        pieces.append(pcm)
+        words_complete = words_complete and bool(segment_words)
+        shift = position / TTS_SAMPLE_RATE
+        words.extend({"word": w["word"], "start": w["start"] + shift, "end": w["end"] + shift} for w in segment_words)
+        position += len(pcm)
+
+    if not any(isinstance(p, np.ndarray) for p in pieces):
+        logger.error("❌ Failed to generate audio after multiple attempts.")
+        send_telegram_alert("❌ **خطأ حرج:** فشل توليد الصوت (Edge-TTS). تم إيقاف العملية.")
+        sys.exit(1) # Critical failure: Exit with code 1 as requested
+
+    # Join speech and silences into one preallocated buffer (silence = the zeroed gaps)
+    total = sum(p if isinstance(p, int) else len(p) for p in pieces)
+    final_pcm = np.zeros(total, dtype=np.int16)
+    offset = 0
+    for p in pieces:
+        if isinstance(p, int):
+            offset += p
+        else:
+            final_pcm[offset:offset + len(p)] = p
+            offset += len(p)
+    
+    write_wav(output_file, final_pcm)
+    duration = total / TTS_SAMPLE_RATE
+    logger.info(f"Successfully generated Edge-TTS audio ({duration:.2f}s)")
+    logger.info(f"TTS cache: {tts_cache.stats()}")
+    if not words_complete:
+        logger.warning("Edge-TTS word boundaries incomplete, word timeline will come from Whisper.")
+        words = []
+    return duration, words
 
 def get_word_timestamps(audio_file):
     """Extracts timestamps using Whisper."""
     logger.info("Extracting timestamps...")
     try:
-        whisper_lib = get_whisper()
-        model = whisper_lib.load_model("tiny")
+        model = whisper_models.get_model("tiny", int8=TIMESTAMPS_INT8)
         result = model.transcribe(audio_file, word_timestamps=True)
         words = []
         for segment in result["segments"]:
@@ -820,34 +970,51 @@ def get_word_timestamps(audio_file):
         return words
     except Exception as e:
         logger.error(f"Whisper failed: {e}")
-        return [{"word": "Error", "start": 0.0, "end": 1.0}]
+        return []
 
 # -----------------------------------------------------------------------------
 # Video Fetching & Processing
 # -----------------------------------------------------------------------------
 
+# Public Invidious Instances (Ordered by reliability for GitHub Runners)
+INVIDIOUS_INSTANCES = [
+    "https://inv.vern.cc",
+    "https://invidious.nerdvpn.de",
+]
+
+def iter_audio_stream_urls(video_id):
+    """
+    Yields the lowest-bitrate audio-only stream URL of a YouTube video from each Invidious instance in turn.
+    URLs are instance-proxied (local=true): raw googlevideo URLs are signed for the instance's IP and 403 here.
+    """
+    for host in INVIDIOUS_INSTANCES:
+        try:
+            res = requests.get(f"{host}/api/v1/videos/{video_id}", params={"local": "true"}, timeout=20)
+            res.raise_for_status()
+            audio_streams = [f for f in res.json().get("adaptiveFormats", [])
+                             if f.get("type", "").startswith("audio/") and f.get("url")]
+            if not audio_streams:
+                continue
+            stream = min(audio_streams, key=lambda f: int(f.get("bitrate") or 0) or float("inf"))
+            logger.info(f"[Invidious] Audio-only stream via {host}: {stream.get('type', '').split(';')[0]} "
+                        f"@ {int(stream.get('bitrate') or 0) // 1000} kbps")
+        except Exception as e:
+            logger.warning(f"[Invidious] Audio stream lookup on {host} failed: {e}")
+            continue
+        yield urljoin(host + "/", stream["url"])
+
 def fallback_download_youtube(youtube_url, output_path):
     """Global Fallback: Downloads video using Invidious API to bypass datacenter blocks."""
     logger.info(f"[Invidious] Attempting global fallback for: {youtube_url}")
     
     # Extract Video ID
-    video_id = None
-    if "v=" in youtube_url:
-        video_id = youtube_url.split("v=")[1].split("&")[0]
-    elif "youtu.be/" in youtube_url:
-        video_id = youtube_url.split("youtu.be/")[1].split("?")[0]
-    elif "youtube.com/shorts/" in youtube_url:
-        video_id = youtube_url.split("shorts/")[1].split("?")[0]
+    video_id = extract_youtube_id(youtube_url)
     
     if not video_id:
         logger.error("[Invidious] Could not extract video ID")
         return None
 
-    # Public Invidious Instances (Ordered by reliability for GitHub Runners)
-    instances = [
-        f"https://inv.vern.cc/api/v1/videos/{video_id}",
-        f"https://invidious.nerdvpn.de/api/v1/videos/{video_id}"
-    ]
+    instances = [f"{host}/api/v1/videos/{video_id}" for host in INVIDIOUS_INSTANCES]
 
     for instance_api in instances:
         try:
@@ -896,11 +1063,12 @@ def fetch_tier1_trailer(movie_title, duration=58, tmdb_id=None, trailer_url=None
     Fetches official trailer via YT-DLP V1.0 logic.
     STRICT MODE: Exits if trailer fails.
     """
+    import yt_dlp
     # Try fetching trailer from TMDB if tmdb_id is available and no trailer_url provided
     if not trailer_url and tmdb_id and tmdb_id != 'N/A':
         try:
-            url = f"https://api.themoviedb.org/3/movie/{tmdb_id}/videos?api_key={TMDB_API_KEY}"
-            res = requests.get(url).json()
+            import tmdb_client
+            res = tmdb_client.get_json(f"/movie/{tmdb_id}/videos") or {}
             videos = res.get('results', [])
             for v in videos:
                 if v.get('site') == 'YouTube' and v.get('type') == 'Trailer':
@@ -997,48 +1165,62 @@ def fetch_tier1_trailer(movie_title, duration=58, tmdb_id=None, trailer_url=None
 
 
 def get_trailer_transcription(trailer_url, movie_title):
-    """Downloads trailer audio and transcribes it using Whisper."""
+    """Streams the trailer's audio-only track and transcribes its speech windows using Whisper."""
+    import transcription
     if not trailer_url:
         logger.warning(f"No trailer URL provided for {movie_title}. Skipping transcription.")
         return ""
 
-    logger.info(f"Downloading trailer audio for transcription: {trailer_url}")
-    audio_path = os.path.join(TEMP_DIR, f"trailer_trans_{int(time.time())}.mp3")
-    
-    # iOS/iPad Safari Client Workaround for Transcription Audio
+    # Re-runs, series seasons and manual re-posts keep bringing back the same trailers
+    video_id = extract_youtube_id(trailer_url)
+    transcription_key = f"{TRANSCRIPTION_MODEL}-int8" if TRANSCRIPTION_INT8 else TRANSCRIPTION_MODEL
+    if video_id:
+        cached = transcript_cache.get(video_id, transcription_key)
+        if cached:
+            logger.info(f"Transcription cache hit for {video_id} ({len(cached['text'])} chars)")
+            return cached["text"]
+
+    # Audio-only: lowest-bitrate stream decoded through an ffmpeg pipe straight to 16 kHz floats.
+    # Each instance gets a turn; the full download is the last resort.
+    audio = None
+    for stream_url in (iter_audio_stream_urls(video_id) if video_id else ()):
+        try:
+            logger.info(f"Streaming trailer audio for transcription: {trailer_url}")
+            audio = transcription.decode_audio(stream_url)
+            if len(audio):
+                break
+        except Exception as e:
+            logger.warning(f"Trailer audio stream failed: {e}")
+    if audio is None or len(audio) == 0:
+        try:
+            logger.info(f"Attempting audio download with multi-strategy: {trailer_url}")
+            res_path = download_video(trailer_url, out_dir=TEMP_DIR)
+            if res_path and os.path.exists(res_path):
+                try:
+                    audio = transcription.decode_audio(res_path)
+                finally:
+                    os.remove(res_path)
+        except Exception as e:
+            logger.warning(f"Trailer audio fetch failed: {e}")
+    if audio is None or len(audio) == 0:
+        return ""
+
     try:
-        logger.info(f"Attempting audio download with multi-strategy: {trailer_url}")
-        res_path = download_video(trailer_url, out_dir=TEMP_DIR)
-        
-        if res_path and os.path.exists(res_path):
-            # Move to audio_path location
-            if os.path.exists(audio_path): os.remove(audio_path)
-            os.rename(res_path, audio_path)
-            
-            # The rest of transcription logic expects audio_path
-            actual_audio_path = audio_path
-            if os.path.exists(actual_audio_path) and os.path.getsize(actual_audio_path) > 1000:
-                logger.info(f"Trailer audio downloaded to {actual_audio_path}. Transcribing...")
-                
-                # Use Whisper to transcribe
-                whisper_lib = get_whisper()
-                model = whisper_lib.load_model("base") # Use "base" or "tiny" for speed
-                result = model.transcribe(actual_audio_path)
-                transcription = result.get("text", "").strip()
-                
-                # Clean up
-                try: os.remove(actual_audio_path)
-                except: pass
-                
-                logger.info(f"Transcription completed ({len(transcription)} chars)")
-                return transcription
-            
+        # Drop silence and music-only stretches before Whisper sees the audio
+        windows = transcription.speech_windows(audio)
+        speech_s = sum(end - start for start, end in windows)
+        logger.info(f"Trailer audio {len(audio) / transcription.SAMPLE_RATE:.1f}s, speech windows {speech_s:.1f}s. Transcribing...")
+        if not windows:
+            return ""
+        model = whisper_models.get_model(TRANSCRIPTION_MODEL, int8=TRANSCRIPTION_INT8)
+        text, segments = transcription.transcribe_windows(model, audio, windows)
+        if video_id and text:
+            transcript_cache.put(video_id, transcription_key, text, segments)
+        logger.info(f"Transcription completed ({len(text)} chars)")
+        return text
     except Exception as e:
-        logger.warning(f"Trailer audio transcription failed with Android spoofing: {e}")
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
-            
-    return ""
+        logger.warning(f"Trailer audio transcription failed: {e}")
+        return ""
 
 
 def get_video_content(item, title, duration, tmdb_id=None, trailer_url=None):
@@ -1086,6 +1268,7 @@ def save_viral_queue(data):
 
 def get_yt_duration(url):
     """Fetches total duration using multi-strategy yt-dlp metadata extraction."""
+    import yt_dlp
     strategies = [
         ("Android-Spoof", {'youtube': ['player_client=android,ios']}),
         ("Web-PO", {'youtube': ['player_client=web', 'player_skip=webpage,js']}),
@@ -1215,23 +1398,11 @@ def download_viral_chunk(duration=20):
 
 def auto_crop_black_bars(clip):
     """Detects and crops horizontal black bars."""
+    from render_engine import detect_black_bars
     logger.info("Auto-detecting black bars...")
     try:
         frame = clip.get_frame(min(clip.duration * 0.1, 2.0))
-        gray_rows = frame.mean(axis=2).mean(axis=1)
-        threshold = 10
-        
-        top_crop = 0
-        for i, val in enumerate(gray_rows):
-            if val > threshold:
-                top_crop = i
-                break
-                
-        bottom_crop = len(gray_rows)
-        for i in range(len(gray_rows)-1, -1, -1):
-            if gray_rows[i] > threshold:
-                bottom_crop = i + 1
-                break
+        top_crop, bottom_crop = detect_black_bars(frame)
         
         if top_crop > 0 or bottom_crop < clip.h:
             logger.info(f"Cropping: Top={top_crop}, Bottom={bottom_crop}")
@@ -1242,33 +1413,23 @@ def auto_crop_black_bars(clip):
 
 def apply_anti_copyright(clip, target_size):
     """Applies Speed 1.01x, Zoom 1.02x."""
+    import moviepy.video.fx as vfx
+    from render_engine import fused_affine, apply_affine
     # Speed 1.01x
     clip = clip.with_effects([vfx.MultiplySpeed(1.01)])
     
-    # Fit to target size then Zoom 1.02x
-    target_w, target_h = target_size
-    ratio_clip = clip.w / clip.h
-    ratio_target = target_w / target_h
-    
-    if ratio_clip > ratio_target:
-        clip = clip.resized(height=target_h)
-    else:
-        clip = clip.resized(width=target_w)
-        
-    # Zoom 1.02x
-    clip = clip.with_effects([vfx.Resize(1.02)])
-    
-    # Center Crop
-    clip = clip.cropped(x1=(clip.w - target_w)//2, y1=(clip.h - target_h)//2, width=target_w, height=target_h)
-    
-    return clip
+    # Fit to target size, Zoom 1.02x and Center Crop as one fused affine warp per frame
+    matrix = fused_affine(clip.w, clip.h, target_size, "cover")
+    return clip.image_transform(lambda frame: apply_affine(frame, matrix, target_size))
 
 # --- Branding Helpers ---
 def get_font():
+    from PIL import ImageFont
     try: return ImageFont.truetype("arial.ttf", FONT_SIZE)
     except: return ImageFont.load_default()
 
 def create_char_image(char, font):
+    from PIL import Image, ImageDraw
     dummy = Image.new('RGBA', (1, 1))
     d = ImageDraw.Draw(dummy)
     bbox = d.textbbox((0, 0), char, font=font)
@@ -1307,6 +1468,8 @@ def process_arabic_text(text):
 
 def get_smart_thumbnail(video_path):
     """Selects the best frame for thumbnail using brightness and Laplacian variance."""
+    import cv2
+    import numpy as np
     logger.info("[*] جاري البحث عن أفضل لقطة للغلاف...")
     cap = cv2.VideoCapture(video_path)
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
@@ -1347,6 +1510,7 @@ def get_smart_thumbnail(video_path):
 
 def apply_branding_to_thumb(image_path, movie_title):
     """Applies branding and movie title to the thumbnail."""
+    from PIL import Image, ImageDraw, ImageFont
     try:
         img = Image.open(image_path)
         draw = ImageDraw.Draw(img)
@@ -1386,20 +1550,120 @@ def apply_branding_to_thumb(image_path, movie_title):
         logger.error(f"Error applying branding to thumb: {e}")
         return image_path
 
-def create_reel(video_path, audio_path, words, output_path, movie_title_en="", poster_path=None):
-    """Assembles the final video with 60/40 split and movie title on divider."""
-    logger.info("Assembling Reel (60/40 Split)...")
+def create_reel(video_path, audio_path, words, output_path, movie_title_en="", poster_path=None, backend=None, viral_path=None,
+                backdrop_paths=None):
+    """
+    Assembles the final video with 60/40 split and movie title on divider.
+    viral_path: optional pre-fetched bottom screen source (kept on disk); downloaded and removed otherwise.
+    poster_path / backdrop_paths: Ken Burns slideshow for the top screen when there is no video.
+    """
+    from moviepy import AudioFileClip
+    from render_engine import RENDERERS, build_ass_subtitles
+    backend = (backend or RENDER_BACKEND).lower()
+    logger.info(f"Assembling Reel (60/40 Split, backend: {backend})...")
     
+    owns_viral = viral_path is None
+    subtitles_path = None
+    retrying = False
     try:
         # Load Audio
         audio_clip = AudioFileClip(audio_path)
         total_duration = audio_clip.duration
         
-        clips_to_composite = []
+        # Ensure output_path is strictly a string
+        if not isinstance(output_path, str):
+            output_path = str(output_path)
+        
+        # --- Bottom Screen Source (downloaded once, shared by all backends) ---
+        if owns_viral:
+            viral_path = download_viral_chunk(total_duration)
+        
+        # --- Top Screen fallback images (poster first, then backdrops) ---
+        slideshow = [
+            p for p in [poster_path, *(backdrop_paths or [])]
+            if p and os.path.exists(p) and os.path.getsize(p) > 0
+        ]
+        
+        # --- Word-timed subtitles (burned in by libass during the encode) ---
+        if BURN_SUBTITLES and words:
+            subtitles_path = build_ass_subtitles(
+                words, os.path.join(TEMP_DIR, f"subtitles_{int(time.time())}.ass"),
+                text_color=TEXT_COLOR, stroke_color=STROKE_COLOR, stroke_width=STROKE_WIDTH
+            )
+        
+        if backend in RENDERERS:
+            try:
+                if RENDERERS[backend](video_path, audio_path, viral_path, output_path, total_duration,
+                                      slideshow=slideshow, subtitles_path=subtitles_path):
+                    audio_clip.close()
+                    return output_path
+            except Exception as e:
+                logger.warning(f"{backend} backend error: {e}")
+            logger.warning(f"{backend} backend failed. Falling back to MoviePy...")
+            retrying = True
+        elif RENDER_SEGMENTS > 1:
+            try:
+                if render_reel_segmented(video_path, audio_path, viral_path, output_path, total_duration,
+                                         slideshow=slideshow, subtitles_path=subtitles_path):
+                    audio_clip.close()
+                    return output_path
+            except Exception as e:
+                logger.warning(f"Segmented render error: {e}")
+            logger.warning("Segmented render failed. Falling back to serial MoviePy render...")
+            retrying = True
         
-        # --- Top Screen (60%, 1080x1152) ---
-        logger.info("Processing Top Screen (60%)...")
-        if video_path and os.path.exists(video_path):
+        # The failed pass may have failed in libass (font, filter); the same ass filter would fail again
+        if retrying and subtitles_path:
+            logger.warning("Fallback render runs without burned-in subtitles.")
+        return render_reel_moviepy(video_path, audio_clip, viral_path, output_path, total_duration,
+                                   slideshow=slideshow, subtitles_path=None if retrying else subtitles_path)
+
+    except Exception as e:
+        logger.error(f"Error in create_reel: {e}")
+        return None
+    finally:
+        if owns_viral and viral_path:
+            try:
+                os.remove(viral_path)
+            except Exception as e:
+                logger.warning(f"Could not remove viral temp file: {e}")
+        if subtitles_path:
+            with contextlib.suppress(FileNotFoundError, PermissionError):
+                os.remove(subtitles_path)
+
+def build_frame_caches(video_path, viral_path, total_duration, shared=False):
+    """Decodes the looped top/bottom sources into frame caches (None where a source does not qualify)."""
+    from render_engine import FrameCache, probe_black_bars, FRAME_CACHE_BUDGET_MB
+    top_cache = bot_cache = None
+    budget_mb = FRAME_CACHE_BUDGET_MB  # One budget for the whole reel, split across both sources
+    if video_path and os.path.exists(video_path):
+        top_cache = FrameCache.build(video_path, (1080, 1152), "stretch", total_duration,
+                                     crop_rows=probe_black_bars(video_path), rgb=True, budget_mb=budget_mb, shared=shared)
+        if top_cache:
+            budget_mb -= top_cache.mb
+    if viral_path and os.path.exists(viral_path):
+        bot_cache = FrameCache.build(viral_path, (1080, 768), "cover", total_duration, rgb=True,
+                                     budget_mb=budget_mb, shared=shared)
+    return top_cache, bot_cache
+
+def build_reel_layers(video_path, viral_path, total_duration, slideshow_path=None, caches=None):
+    """
+    Builds the MoviePy layers of the 60/40 layout (top, bottom, logo, website) in composite order.
+    caches: prebuilt (top, bottom) frame caches; built here when not given.
+    """
+    from moviepy import VideoFileClip, ColorClip, VideoClip
+    import moviepy.video.fx as vfx
+    from render_engine import fused_affine, apply_affine
+    top_cache, bot_cache = caches if caches is not None else build_frame_caches(video_path, viral_path, total_duration)
+    clips_to_composite = []
+    
+    # --- Top Screen (60%, 1080x1152) ---
+    logger.info("Processing Top Screen (60%)...")
+    if video_path and os.path.exists(video_path):
+        # Short trailer cut that has to loop: decoded once into the frame cache (cropped, stretched, zoomed)
+        if top_cache:
+            top_clip = VideoClip(frame_function=top_cache.frame_at, duration=total_duration)
+        else:
             top_clip = VideoFileClip(video_path)
             top_clip = auto_crop_black_bars(top_clip)
             
@@ -1408,56 +1672,36 @@ def create_reel(video_path, audio_path, words, output_path, movie_title_en="", p
             else:
                 top_clip = top_clip.subclipped(0, total_duration)
                 
-            # Force Stretch Vertically to 1152px (ignoring aspect ratio)
-            top_clip = top_clip.with_effects([vfx.Resize(new_size=(1080, 1152))])
-            
             # Anti-Copyright Effects
             top_clip = top_clip.with_effects([vfx.MultiplySpeed(1.01)])
-            top_clip = top_clip.with_effects([vfx.Resize(1.02)])
-            
-            # Crop back to 1080x1152
-            w_final, h_final = 1080, 1152
-            top_clip = top_clip.cropped(
-                x1=(top_clip.w - w_final)//2, 
-                y1=(top_clip.h - h_final)//2, 
-                width=w_final, 
-                height=h_final
-            )
             
-            top_clip = top_clip.with_position((0, 0))
-            clips_to_composite.append(top_clip)
-        elif poster_path and os.path.exists(poster_path) and os.path.getsize(poster_path) > 0:
-            logger.info("Using Poster/Image as fallback for Top Screen...")
-            try:
-                # Load image, resize to fill width, then center crop/pan
-                img_clip = ImageClip(poster_path).with_duration(total_duration)
-                
-                # Calculate resize to fill 1080x1152
-                w_img, h_img = img_clip.size
-                scale = max(1080/w_img, 1152/h_img)
-                img_clip = img_clip.with_effects([vfx.Resize(scale)])
-                
-                # Center Crop
-                img_clip = img_clip.cropped(x1=(img_clip.w - 1080)//2, y1=(img_clip.h - 1152)//2, width=1080, height=1152)
-                
-                # Apply Ken Burns effect (Subtle Zoom)
-                img_clip = img_clip.with_effects([vfx.Resize(lambda t: 1.0 + 0.05 * (t/total_duration))])
-                img_clip = img_clip.cropped(x1=(img_clip.w - 1080)//2, y1=(img_clip.h - 1152)//2, width=1080, height=1152)
-                
-                img_clip = img_clip.with_position((0, 0))
-                clips_to_composite.append(img_clip)
-            except Exception as e:
-                logger.error(f"ImageClip failed for {poster_path}: {e}")
-                clips_to_composite.append(ColorClip(size=(1080, 1152), color=(0,0,0), duration=total_duration).with_position((0,0)))
-        else:
-            logger.warning("No video or poster path found for Top Screen.")
-            clips_to_composite.append(ColorClip(size=(1080, 1152), color=(0,0,0), duration=total_duration).with_position((0,0)))
-
-        # --- Bottom Screen (40%, 1080x768) ---
-        logger.info("Processing Bottom Screen (40%)...")
-        viral_path = download_viral_chunk(total_duration)
+            # Force Stretch to 1080x1152 (ignoring aspect ratio), Zoom 1.02x and crop back,
+            # fused into one affine warp per frame
+            top_matrix = fused_affine(top_clip.w, top_clip.h, (1080, 1152), "stretch")
+            top_clip = top_clip.image_transform(lambda frame: apply_affine(frame, top_matrix, (1080, 1152)))
         
-        if viral_path and os.path.exists(viral_path):
+        top_clip = top_clip.with_position((0, 0))
+        clips_to_composite.append(top_clip)
+    elif slideshow_path and os.path.exists(slideshow_path):
+        logger.info("Using pre-rendered Poster/Backdrop slideshow as fallback for Top Screen...")
+        try:
+            # Already 1080x1152 with the Ken Burns zoom and crossfades baked in
+            img_clip = VideoFileClip(slideshow_path).with_position((0, 0))
+            clips_to_composite.append(img_clip)
+        except Exception as e:
+            logger.error(f"Slideshow clip failed for {slideshow_path}: {e}")
+            clips_to_composite.append(ColorClip(size=(1080, 1152), color=(0,0,0), duration=total_duration).with_position((0,0)))
+    else:
+        logger.warning("No video or poster path found for Top Screen.")
+        clips_to_composite.append(ColorClip(size=(1080, 1152), color=(0,0,0), duration=total_duration).with_position((0,0)))
+
+    # --- Bottom Screen (40%, 1080x768) ---
+    logger.info("Processing Bottom Screen (40%)...")
+    if viral_path and os.path.exists(viral_path):
+        # Short viral chunk that has to loop: decoded once into the frame cache (anti-copyright fit baked in)
+        if bot_cache:
+            bot_clip = VideoClip(frame_function=bot_cache.frame_at, duration=total_duration)
+        else:
             bot_clip = VideoFileClip(viral_path).without_audio()
             if bot_clip.duration < total_duration:
                 bot_clip = bot_clip.with_effects([vfx.Loop(duration=total_duration)])
@@ -1465,82 +1709,124 @@ def create_reel(video_path, audio_path, words, output_path, movie_title_en="", p
                 bot_clip = bot_clip.subclipped(0, total_duration)
                 
             bot_clip = apply_anti_copyright(bot_clip, (1080, 768))
-            bot_clip = bot_clip.with_position((0, 1152))
-            clips_to_composite.append(bot_clip)
-        else:
-            logger.warning("No viral video found for Bottom Screen.")
-            clips_to_composite.append(ColorClip(size=(1080, 768), color=(20,20,20), duration=total_duration).with_position((0,1152)))
-
-        # --- Logo ---
-        logo_path = "logo.png"
-        if os.path.exists(logo_path):
-            logo_img = Image.open(logo_path).convert("RGBA")
-            logo_np = np.array(logo_img)
-            logo = ImageClip(logo_np, transparent=True)
-            logo = (logo.with_duration(total_duration)
-                    .with_effects([vfx.Resize(width=225)]) 
-                    .with_position((10, 30)))
-            clips_to_composite.append(logo)
-        else:
-            logger.warning(f"Logo not found at {logo_path}")
-
-        # --- Website Image (website.png) ---
-        website_img_path = "website.png"
-        website_clip = None
-        if os.path.exists(website_img_path):
-            try:
-                web_img = Image.open(website_img_path).convert("RGBA")
-                web_np = np.array(web_img)
-                website_clip = (ImageClip(web_np, transparent=True)
-                                .with_duration(total_duration)
-                                .with_effects([vfx.Resize(width=int(1080 * 0.7))])
-                                .with_position(('center', 0.93), relative=True))
-            except Exception as e:
-                logger.error(f"Error adding website image: {e}")
-        else:
-            logger.warning(f"website.png not found at {website_img_path}")
-
-        # --- Composite final video with correct layer order ---
-        # Append critical overlays at the VERY END to ensure they are on top
-        if website_clip:
-            clips_to_composite.append(website_clip)
-            logger.info("Added website.png overlay at bottom center")
-
-        logger.info("Rendering final video...")
-        with console.status("[bold red]Rendering Final Reel...[/bold red]"):
-            final = CompositeVideoClip(clips_to_composite, size=(1080, 1920))
-            voiceover_audio = audio_clip
-            mixed_audio = voiceover_audio
-            final = final.with_audio(mixed_audio)
-            
-            # Ensure output_path is strictly a string
-            if not isinstance(output_path, str):
-                output_path = str(output_path)
-                
-            final.write_videofile(output_path, fps=30, codec='libx264', audio_codec='aac', threads=4)
+        bot_clip = bot_clip.with_position((0, 1152))
+        clips_to_composite.append(bot_clip)
+    else:
+        logger.warning("No viral video found for Bottom Screen.")
+        clips_to_composite.append(ColorClip(size=(1080, 768), color=(20,20,20), duration=total_duration).with_position((0,1152)))
+
+    return clips_to_composite
+
+def composite_reel(clips, total_duration):
+    """Composites the screen layers, then blends the cached branding layer (logo + website) once per frame."""
+    from moviepy import CompositeVideoClip
+    from render_engine import load_branding_layer, apply_branding
+    final = CompositeVideoClip(clips, size=(1080, 1920)).with_duration(total_duration)
+    branding = load_branding_layer()
+    if branding:
+        final = final.image_transform(lambda frame: apply_branding(frame, branding))
+        logger.info("Added branding layer (logo + website.png) from cache")
+    return final
+
+def render_slideshow_clip(video_path, slideshow, total_duration):
+    """Pre-renders the Ken Burns slideshow once for the MoviePy backends when the top screen has no video."""
+    from render_engine import render_ken_burns
+    if (video_path and os.path.exists(video_path)) or not slideshow:
+        return None
+    return render_ken_burns(slideshow, total_duration, os.path.join(TEMP_DIR, f"slideshow_{int(time.time())}.mp4"))
+
+def render_reel_moviepy(video_path, audio_clip, viral_path, output_path, total_duration, slideshow=None, subtitles_path=None):
+    """MoviePy render backend: composites every layer per frame in Python."""
+    from render_engine import ass_filter
+    slideshow_path = render_slideshow_clip(video_path, slideshow, total_duration)
+    clips_to_composite = build_reel_layers(video_path, viral_path, total_duration, slideshow_path=slideshow_path)
+
+    logger.info("Rendering final video...")
+    with console.status("[bold red]Rendering Final Reel...[/bold red]"):
+        final = composite_reel(clips_to_composite, total_duration)
+        voiceover_audio = audio_clip
+        mixed_audio = voiceover_audio
+        final = final.with_audio(mixed_audio)
         
-        # Cleanup
+        final.write_videofile(output_path, fps=30, codec='libx264', audio_codec='aac', threads=4,
+                              ffmpeg_params=["-vf", ass_filter(subtitles_path)] if subtitles_path else None)
+    
+    # Cleanup
+    final.close()
+    audio_clip.close()
+    
+    # Explicitly close sub-clips to release file handles on Windows
+    for clip in clips_to_composite:
+        try:
+            clip.close()
+        except:
+            pass
+    if slideshow_path:
+        with contextlib.suppress(FileNotFoundError, PermissionError):
+            os.remove(slideshow_path)
+            
+    return output_path
+
+def render_reel_segment(job):
+    """Worker process: renders one time segment of the reel layout (video only, no audio)."""
+    from render_engine import FPS, FrameCache, ass_filter
+    (video_path, viral_path, slideshow_path, total_duration, start, end, segment_path, threads, subtitles_path,
+     cache_specs) = job
+    # Frame caches were decoded once by the parent: map them read-only instead of decoding per segment
+    caches = tuple(FrameCache.attach(spec) if spec else None for spec in cache_specs)
+    clips = build_reel_layers(video_path, viral_path, total_duration, slideshow_path=slideshow_path, caches=caches)
+    final = composite_reel(clips, total_duration)
+    final = final.subclipped(start, min(end, final.duration))
+    try:
+        final.write_videofile(segment_path, fps=FPS, codec='libx264', audio=False, threads=threads, logger=None,
+                              ffmpeg_params=["-vf", ass_filter(subtitles_path, offset=start)] if subtitles_path else None)
+    finally:
         final.close()
-        audio_clip.close()
-        
-        # Explicitly close sub-clips to release file handles on Windows
-        for clip in clips_to_composite:
+        for clip in clips:
             try:
                 clip.close()
             except:
                 pass
-                
-        if viral_path:
-            try:
-                os.remove(viral_path)
-            except Exception as e:
-                logger.warning(f"Could not remove viral temp file: {e}")
-                
-        return output_path
+    return segment_path
 
-    except Exception as e:
-        logger.error(f"Error in create_reel: {e}")
-        return None
+def render_reel_segmented(video_path, audio_path, viral_path, output_path, total_duration, slideshow=None,
+                          segments=None, subtitles_path=None):
+    """
+    Splits the timeline into N segments rendered in parallel worker processes,
+    then joins them losslessly (concat demuxer) and muxes the voiceover once.
+    """
+    from render_engine import segment_bounds, concat_segments
+    segments = segments or RENDER_SEGMENTS
+    bounds = segment_bounds(total_duration, segments)
+    workers = min(len(bounds), os.cpu_count() or 1)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    stamp = int(time.time())
+    slideshow_path = render_slideshow_clip(video_path, slideshow, total_duration)
+    # One decode for all segments, shared by every worker: FRAME_CACHE_BUDGET_MB covers the whole reel
+    caches = build_frame_caches(video_path, viral_path, total_duration, shared=True)
+    cache_specs = tuple(cache.spec() if cache else None for cache in caches)
+    jobs = [
+        (video_path, viral_path, slideshow_path, total_duration, start, end,
+         os.path.join(TEMP_DIR, f"reel_seg_{stamp}_{i:03d}.mp4"), threads, subtitles_path, cache_specs)
+        for i, (start, end) in enumerate(bounds)
+    ]
+    
+    logger.info(f"Rendering final video in {len(jobs)} segments on {workers} worker processes...")
+    segment_paths = []
+    try:
+        with console.status(f"[bold red]Rendering Final Reel ({len(jobs)} segments)...[/bold red]"):
+            # spawn, not fork: by now this process runs other threads (browser pool, TMDB pool, torch)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                segment_paths = list(pool.map(render_reel_segment, jobs))
+        return concat_segments(segment_paths, audio_path, output_path)
+    finally:
+        for cache in caches:
+            if cache:
+                cache.close()
+        for path in [job[6] for job in jobs] + [slideshow_path]:
+            if path:
+                with contextlib.suppress(FileNotFoundError, PermissionError):
+                    os.remove(path)
 
 # -----------------------------------------------------------------------------
 # Main Execution
@@ -1711,8 +1997,9 @@ def upload_to_facebook(video_path, thumb_path, caption, comment_text, page_id, a
             
         logger.info(f"Reel Published! ID: {video_id}. Polling for status...")
         
-        # --- Update Scheduling and Posted ID after Success ---
-        update_scheduling(content_id=content_id)
+        # --- Update Scheduling and Posted ID after Success (catalog posts only; manual posts have no ID) ---
+        if content_id is not None:
+            update_scheduling(content_id=content_id)
         
         # 4. Polling for Readiness
         for _ in range(10): # Max 5 minutes
@@ -1827,11 +2114,18 @@ async def wait_for_telegram_video(movie_title, timeout_mins=10):
     send_telegram_alert("⚠️ انتهى الوقت! سيتم الاستمرار باستخدام بوستر الفيلم فقط كخلفية.")
     return None
 
-async def run_one_cycle():
+async def run_one_cycle(force_post=None, manual=None):
+    """
+    One full cycle: select content, script, voiceover, render, publish.
+    force_post: skip the server rotation check (defaults to FORCE_POST=true).
+    manual: {"title", "trailer_url", "overview"} to produce a specific title instead of catalog selection.
+    """
+    if force_post is None:
+        force_post = os.getenv("FORCE_POST") == "true"
     logger.info("--- Starting Cinema Social Bot (LOCKED MODE) ---")
     
     # Economy Mode: Alternate between servers to save bandwidth
-    if not check_server_turn() and os.getenv("FORCE_POST") != "true":
+    if not check_server_turn() and not force_post:
         logger.info("Economy Mode Active: Skipping this turn as per rotation.")
         return
 
@@ -1839,9 +2133,18 @@ async def run_one_cycle():
     audio_path = None
     output_video_path = None
     
+    # Warm the transcription model while content selection is busy with network I/O
+    if whisper_models.WHISPER_PRELOAD:
+        whisper_models.preload(TRANSCRIPTION_MODEL, int8=TRANSCRIPTION_INT8)
+
     try:
         # 1. Content - New Catalog-driven Selection
-        selected_content = await select_best_content()
+        from content_manager import select_best_content, manual_content
+        if manual and manual.get("title"):
+            selected_content = await manual_content(manual["title"], manual.get("trailer_url"), manual.get("overview"))
+            selected_content['Watch_URL'] = get_watch_url_from_supabase(manual["title"])
+        else:
+            selected_content = await select_best_content()
         if not selected_content:
             msg = "⚠️ لم يتم العثور على محتوى جديد في Supabase (تم نشر كل شيء). بانتظار إضافة أفلام جديدة..."
             logger.warning(msg)
@@ -1849,8 +2152,9 @@ async def run_one_cycle():
             sys.exit(0)
 
         title = selected_content['Title']
-        # Use our own DB ID as movie_id for tracking, but keep tmdb_id for metadata
-        content_db_id = selected_content.get('id', selected_content['tmdb_id'])
+        # Use our own DB ID as movie_id for tracking, but keep tmdb_id for metadata.
+        # Manual jobs are not catalog rows: None keeps TMDB ids out of the catalog state
+        content_db_id = None if manual else selected_content.get('id') or selected_content['tmdb_id']
         movie_id = selected_content['tmdb_id']
         poster_url = selected_content['Poster_URL']
         trailer_url = selected_content['Trailer_URL']
@@ -1894,9 +2198,9 @@ async def run_one_cycle():
         final_script = f"{formatted_intro} [PAUSE] {ai_story} [PAUSE] {OUTRO_TEXT}"
         
         # 4. Audio
-        audio_path = f"{TEMP_DIR}/voiceover.mp3"
+        audio_path = f"{TEMP_DIR}/voiceover.wav"
         # Apply -20% rate for slower narration (0.8 speed) as requested by user
-        audio_duration = await generate_audio(final_script, audio_path, media_type=media_type, rate="-20%")
+        audio_duration, tts_words = await generate_audio(final_script, audio_path, media_type=media_type, rate="-20%")
         if audio_duration and audio_duration < 55:
             logger.warning(f"Audio too short ({audio_duration:.1f} seconds), video will be short.")
         
@@ -1907,8 +2211,10 @@ async def run_one_cycle():
         if ENABLE_VIDEO_GENERATION:
             logger.info("Starting Video Generation...")
             
-            # Extract timestamps for subtitles
-            words = get_word_timestamps(audio_path)
+            # Timestamps for subtitles: exact Edge-TTS word boundaries, Whisper only as a fallback
+            words = tts_words
+            if BURN_SUBTITLES and not words:
+                words = get_word_timestamps(audio_path)
             
             # Get Video Content (Hybrid Mode: Try Telegram first if Trailer fails)
             video_path = get_video_content({}, title, int(audio_duration) if audio_duration else 58, tmdb_id=movie_id, trailer_url=trailer_url)
@@ -1917,10 +2223,14 @@ async def run_one_cycle():
                 logger.info("Hybrid Mode: Trailer failed or disabled. Waiting for Telegram upload...")
                 video_path = await wait_for_telegram_video(title, timeout_mins=10)
             
+            # No video at all: the top screen becomes a poster + backdrops Ken Burns slideshow
+            backdrop_paths = [] if video_path else get_backdrops(movie_id, media_type)
+            
         # Assemble Reel (New Logic)
         output_video_path = f"{OUTPUT_DIR}/final_reel.mp4"
         try:
-            if not create_reel(video_path, audio_path, words, output_video_path, movie_title_en=title, poster_path=poster_path):
+            if not create_reel(video_path, audio_path, words, output_video_path, movie_title_en=title, poster_path=poster_path,
+                               backdrop_paths=backdrop_paths):
                 logger.error("Reel generation failed.")
                 sys.exit(1) # Critical failure at render stage
         except Exception:
@@ -1969,6 +2279,8 @@ async def run_one_cycle():
         send_error_email("Bot Cycle Crashed", str(e))
         sys.exit(1) # Ensure GitHub Actions shows failure on crash
     finally:
+        import tmdb_client
+        logger.info(f"TMDB cache: {tmdb_client.stats()}")
         # Final cleanup
         if audio_path and os.path.exists(audio_path):
             # Retry delete to avoid Windows file-in-use errors
@@ -0,0 +1,905 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import subprocess
+
+import cv2
+import numpy as np
+from PIL import Image, ImageColor
+
+logger = logging.getLogger(__name__)
+
+# --- Reel Layout (9:16, 60/40 split) ---
+REEL_SIZE = (1080, 1920)
+TOP_SIZE = (1080, 1152)
+BOTTOM_SIZE = (1080, 768)
+FPS = 30
+
+# Anti-Copyright Effects
+SPEED_FACTOR = 1.01
+ZOOM_FACTOR = 1.02
+
+# Branding
+LOGO_PATH = "logo.png"
+LOGO_WIDTH = 225
+LOGO_POS = (10, 30)
+WEBSITE_IMG_PATH = "website.png"
+WEBSITE_WIDTH = int(1080 * 0.7)
+WEBSITE_REL_Y = 0.93
+
+# Ken Burns slideshow (poster / backdrop fallback for the top screen)
+KEN_BURNS_ZOOM = 0.05
+CROSSFADE_DURATION = 1.0
+
+# Word-timed subtitles (ASS, rendered by libass inside the encoder pass)
+SUBTITLE_FONT = os.environ.get("SUBTITLE_FONT", "Amiri")
+SUBTITLE_FONT_SIZE = 64
+SUBTITLE_WORDS_PER_LINE = 3
+SUBTITLE_HIGHLIGHT_COLOR = "yellow"
+SUBTITLE_POS = (REEL_SIZE[0] // 2, TOP_SIZE[1])  # Centered on the 60/40 divider
+
+# Decoded-frame cache for looped short sources (decoded once at layer size, memory-mapped)
+FRAME_CACHE_BUDGET_MB = int(os.environ.get("FRAME_CACHE_BUDGET_MB", "768"))
+
+# Persistent caches (not cleaned between runs, unlike temp/ and output/)
+CACHE_DIR = "cache"
+
+_branding_planes = {}
+_branding_layers = {}
+
+
+def detect_black_bars(frame, threshold=10):
+    """Returns (top, bottom) row bounds of the picture area inside horizontal black bars."""
+    gray_rows = frame.mean(axis=2).mean(axis=1)
+
+    top_crop = 0
+    for i, val in enumerate(gray_rows):
+        if val > threshold:
+            top_crop = i
+            break
+
+    bottom_crop = len(gray_rows)
+    for i in range(len(gray_rows)-1, -1, -1):
+        if gray_rows[i] > threshold:
+            bottom_crop = i + 1
+            break
+
+    return top_crop, bottom_crop
+
+
+def probe_black_bars(video_path):
+    """Samples one frame with OpenCV (same timestamp as auto_crop_black_bars). Returns (top, bottom) or None."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or FPS
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        duration = frame_count / fps if frame_count > 0 else 0
+        cap.set(cv2.CAP_PROP_POS_MSEC, min(duration * 0.1, 2.0) * 1000)
+        ret, frame = cap.read()
+        if not ret:
+            return None
+        top_crop, bottom_crop = detect_black_bars(frame)
+        if top_crop > 0 or bottom_crop < frame.shape[0]:
+            return top_crop, bottom_crop
+        return None
+    finally:
+        cap.release()
+
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _branding_overlays():
+    """Static overlays in layer order: (path, width, position). None = centered horizontally."""
+    return [
+        (LOGO_PATH, LOGO_WIDTH, LOGO_POS),
+        (WEBSITE_IMG_PATH, WEBSITE_WIDTH, (None, int(REEL_SIZE[1] * WEBSITE_REL_Y))),
+    ]
+
+
+def _build_branding_plane(overlays, size):
+    """Flattens the overlays into one premultiplied RGBA plane. Returns (plane, boxes)."""
+    width, height = size
+    plane = np.zeros((height, width, 4), dtype=np.float32)
+    boxes = []
+    for path, target_w, (x, y) in overlays:
+        img = Image.open(path).convert("RGBA")
+        target_h = max(1, int(round(img.height * target_w / img.width)))
+        rgba = np.asarray(img.resize((target_w, target_h), Image.Resampling.LANCZOS), dtype=np.float32) / 255.0
+        if x is None:
+            x = (width - target_w) // 2
+
+        # Clip the overlay to the reel frame
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + target_w, width), min(y + target_h, height)
+        if x1 <= x0 or y1 <= y0:
+            continue
+        src = rgba[y0 - y:y1 - y, x0 - x:x1 - x]
+        alpha = src[..., 3:4]
+
+        # Porter-Duff "over" in premultiplied space
+        dst = plane[y0:y1, x0:x1]
+        dst[..., :3] = src[..., :3] * alpha + dst[..., :3] * (1 - alpha)
+        dst[..., 3:4] = alpha + dst[..., 3:4] * (1 - alpha)
+        boxes.append((x0, y0, x1, y1))
+
+    return np.round(plane * 255).astype(np.uint8), np.array(boxes, dtype=np.int32).reshape(-1, 4)
+
+
+def get_branding_plane():
+    """
+    Returns (key, plane, boxes) for logo.png + website.png, or None if neither exists.
+    The plane is a 1080x1920 premultiplied RGBA image stored in CACHE_DIR, keyed by file hashes and positions.
+    """
+    overlays = []
+    for path, target_w, pos in _branding_overlays():
+        if os.path.exists(path):
+            overlays.append((path, target_w, pos))
+        else:
+            logger.warning(f"Branding image not found at {path}")
+    if not overlays:
+        return None
+
+    key_data = [(_file_digest(path), target_w, pos) for path, target_w, pos in overlays]
+    key = hashlib.sha1(json.dumps([REEL_SIZE, key_data]).encode()).hexdigest()[:16]
+    if key in _branding_planes:
+        return _branding_planes[key]
+    cache_path = os.path.join(CACHE_DIR, f"branding_{key}.npz")
+
+    plane = boxes = None
+    if os.path.exists(cache_path):
+        try:
+            with np.load(cache_path) as data:
+                plane, boxes = data["plane"], data["boxes"]
+        except Exception as e:
+            logger.warning(f"Branding cache unreadable, rebuilding: {e}")
+
+    if plane is None:
+        logger.info("Building branding layer cache...")
+        plane, boxes = _build_branding_plane(overlays, REEL_SIZE)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        np.savez_compressed(cache_path, plane=plane, boxes=boxes)
+
+    _branding_planes[key] = (key, plane, boxes)
+    return _branding_planes[key]
+
+
+def load_branding_layer(bgr=False):
+    """
+    Returns the branding layer as per-box blend data [(x0, y0, x1, y1, rgb_premultiplied, inverse_alpha)],
+    so each frame only blends the overlay bounding boxes. Returns None if there is no branding.
+    """
+    cached = get_branding_plane()
+    if cached is None:
+        return None
+    key, plane, boxes = cached
+    if (key, bgr) in _branding_layers:
+        return _branding_layers[(key, bgr)]
+
+    layer = []
+    for x0, y0, x1, y1 in boxes:
+        region = plane[y0:y1, x0:x1]
+        rgb = region[..., 2::-1] if bgr else region[..., :3]
+        inv_alpha = (255 - region[..., 3:4]).astype(np.uint16)
+        layer.append((int(x0), int(y0), int(x1), int(y1), np.ascontiguousarray(rgb, dtype=np.uint16), inv_alpha))
+    _branding_layers[(key, bgr)] = layer
+    return layer
+
+
+def apply_branding(frame, layer):
+    """Blends the branding layer onto a uint8 frame in place (bounding boxes only) and returns it."""
+    if not frame.flags.writeable:
+        frame = frame.copy()
+    for x0, y0, x1, y1, rgb, inv_alpha in layer:
+        region = frame[y0:y1, x0:x1]
+        region[...] = rgb + (region * inv_alpha + 127) // 255
+    return frame
+
+
+def export_branding_overlays():
+    """Writes each branding box as a straight-alpha PNG (cached) for FFmpeg. Returns [(path, x, y)]."""
+    cached = get_branding_plane()
+    if cached is None:
+        return []
+    key, plane, boxes = cached
+
+    overlays = []
+    for i, (x0, y0, x1, y1) in enumerate(boxes):
+        path = os.path.join(CACHE_DIR, f"branding_{key}_{i}.png")
+        if not os.path.exists(path):
+            region = plane[y0:y1, x0:x1].astype(np.float32)
+            alpha = region[..., 3:4]
+            rgb = np.where(alpha > 0, region[..., :3] * 255 / np.maximum(alpha, 1), 0)
+            straight = np.concatenate([np.clip(np.round(rgb), 0, 255), alpha], axis=2).astype(np.uint8)
+            Image.fromarray(straight, "RGBA").save(path)
+        overlays.append((path, int(x0), int(y0)))
+    return overlays
+
+
+def fused_affine(src_w, src_h, target_size, mode, zoom=ZOOM_FACTOR):
+    """
+    Collapses resize -> 1.02x zoom -> center crop into one 2x3 affine matrix that maps source pixels
+    straight onto the target size (one interpolation, no oversized intermediate frame).
+    mode: "stretch" (top screen, ignores aspect ratio) or "cover" (apply_anti_copyright fit).
+    """
+    target_w, target_h = target_size
+    if mode == "stretch":
+        scale_x, scale_y = target_w / src_w * zoom, target_h / src_h * zoom
+    else:
+        scale_x = scale_y = max(target_w / src_w, target_h / src_h) * zoom
+    # Centered crop, using the same half-pixel centre convention as cv2.resize
+    offset_x = (target_w - src_w * scale_x) / 2 + 0.5 * (scale_x - 1)
+    offset_y = (target_h - src_h * scale_y) / 2 + 0.5 * (scale_y - 1)
+    return np.float32([[scale_x, 0, offset_x], [0, scale_y, offset_y]])
+
+
+def apply_affine(frame, matrix, size, dst=None):
+    """Applies a fused_affine matrix in a single interpolation (optionally into a preallocated dst)."""
+    return cv2.warpAffine(frame, matrix, size, dst=dst, flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+# -----------------------------------------------------------------------------
+# Ken Burns Slideshow
+# -----------------------------------------------------------------------------
+
+def _cover_size(src_w, src_h, target_w, target_h):
+    scale = max(target_w / src_w, target_h / src_h)
+    return int(round(src_w * scale)), int(round(src_h * scale))
+
+
+class KenBurns:
+    """
+    Ken Burns slideshow over one or more images, alternating zoom in / zoom out per image with crossfades.
+    Each image is cover-scaled once to a working image at the maximum zoom; every frame is then a single
+    affine crop of that working image (always a downscale, so no per-frame full-resolution resample).
+    """
+
+    def __init__(self, image_paths, size, total_duration, zoom=KEN_BURNS_ZOOM, crossfade=CROSSFADE_DURATION):
+        self.size = size
+        self.zoom = zoom
+        self.work = []
+        w, h = size
+        work_w, work_h = int(round(w * (1 + zoom))), int(round(h * (1 + zoom)))
+        for path in image_paths:
+            img = cv2.imread(path)
+            if img is None:
+                logger.warning(f"Could not read slideshow image {path}, skipping.")
+                continue
+            cover_w, cover_h = _cover_size(img.shape[1], img.shape[0], work_w, work_h)
+            img = cv2.resize(img, (cover_w, cover_h), interpolation=cv2.INTER_AREA)
+            x0, y0 = (cover_w - work_w) // 2, (cover_h - work_h) // 2
+            self.work.append(np.ascontiguousarray(img[y0:y0 + work_h, x0:x0 + work_w]))
+        if not self.work:
+            raise ValueError("No readable slideshow images")
+
+        count = len(self.work)
+        self.crossfade = min(crossfade, total_duration / count / 2) if count > 1 else 0.0
+        # Slots overlap by the crossfade: count * slot - (count - 1) * crossfade == total_duration
+        self.slot = (total_duration + (count - 1) * self.crossfade) / count
+        self.scratch = np.empty((h, w, 3), dtype=np.uint8)
+
+    def _render_image(self, index, local_t, dst):
+        progress = min(max(local_t / self.slot, 0.0), 1.0)
+        if index % 2:
+            progress = 1.0 - progress  # Alternate zoom in / zoom out
+        work = self.work[index]
+        matrix = fused_affine(work.shape[1], work.shape[0], self.size, "cover", zoom=1.0 + self.zoom * progress)
+        apply_affine(work, matrix, self.size, dst=dst)
+
+    def render(self, out_index, dst):
+        t = out_index / FPS
+        step = self.slot - self.crossfade
+        index = min(int(t // step) if step > 0 else 0, len(self.work) - 1)
+        local_t = t - index * step
+        self._render_image(index, local_t, dst)
+        # Crossfade in from the previous image, which is still in the last seconds of its slot
+        if index > 0 and local_t < self.crossfade:
+            alpha = local_t / self.crossfade
+            self._render_image(index - 1, local_t + step, self.scratch)
+            cv2.addWeighted(self.scratch, 1.0 - alpha, dst, alpha, 0, dst=dst)
+
+
+def render_ken_burns(image_paths, total_duration, output_path, size=TOP_SIZE):
+    """
+    Renders the slideshow as a standalone intermediate clip (size, FPS, total_duration) through a raw
+    pipe into FFmpeg. Returns output_path on success, None on failure.
+    """
+    logger.info(f"Rendering Ken Burns slideshow ({len(image_paths)} images)...")
+    try:
+        slideshow = KenBurns(image_paths, size, total_duration)
+    except Exception as e:
+        logger.warning(f"Ken Burns slideshow failed: {e}")
+        return None
+
+    frame = np.empty((size[1], size[0], 3), dtype=np.uint8)
+    cmd = [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{size[0]}x{size[1]}", "-r", str(FPS), "-i", "-",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "16", "-pix_fmt", "yuv420p",
+        str(output_path)
+    ]
+    try:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            for i in range(int(round(total_duration * FPS))):
+                slideshow.render(i, frame)
+                proc.stdin.write(frame.data)
+            proc.stdin.close()
+            stderr = proc.stderr.read().decode(errors="ignore")
+            proc.wait()
+        except Exception:
+            proc.kill()
+            proc.wait()
+            raise
+    except Exception as e:
+        logger.warning(f"Ken Burns slideshow render failed: {e}")
+        return None
+
+    if proc.returncode != 0 or not os.path.exists(output_path):
+        logger.warning(f"Ken Burns slideshow render failed (code {proc.returncode}): {stderr[-1000:]}")
+        return None
+    return output_path
+
+
+# -----------------------------------------------------------------------------
+# ASS Subtitles
+# -----------------------------------------------------------------------------
+
+def _ass_color(color):
+    """PIL color (name or #hex) -> ASS &HAABBGGRR."""
+    r, g, b = ImageColor.getrgb(color)[:3]
+    return f"&H00{b:02X}{g:02X}{r:02X}"
+
+
+def _ass_time(seconds):
+    cs = int(round(max(seconds, 0) * 100))
+    return f"{cs // 360000}:{cs // 6000 % 60:02d}:{cs // 100 % 60:02d}.{cs % 100:02d}"
+
+
+def _ass_text(word):
+    # Braces open override blocks in ASS
+    return word.replace("{", "(").replace("}", ")").replace("\\", "/").replace("\n", " ").strip()
+
+
+def group_subtitle_lines(words, per_line=SUBTITLE_WORDS_PER_LINE, max_gap=0.6):
+    """Groups word timestamps into short lines, breaking on pauses and sentence punctuation."""
+    lines, current = [], []
+    for w in words:
+        if current and (len(current) >= per_line or w["start"] - current[-1]["end"] > max_gap):
+            lines.append(current)
+            current = []
+        current.append(w)
+        if w["word"].endswith((".", "،", ",", "؟", "?", "!", ":")):
+            lines.append(current)
+            current = []
+    if current:
+        lines.append(current)
+    return lines
+
+
+def build_ass_subtitles(words, output_path, text_color="white", stroke_color="black", stroke_width=2):
+    """
+    Writes a word-synchronised ASS track: one short line at a time on the divider, with the spoken
+    word highlighted. Returns output_path, or None if there are no usable words.
+    """
+    words = [w for w in words or [] if _ass_text(w.get("word", "")) and w["end"] > w["start"]]
+    if not words:
+        return None
+
+    try:
+        import arabic_reshaper
+        reshape = arabic_reshaper.reshape
+    except ImportError:
+        reshape = lambda text: text
+    # Shape only (presentation forms); libass runs FriBidi itself, so get_display() here would
+    # reverse the line twice.
+    tokens = {id(w): reshape(_ass_text(w["word"])) for w in words}
+
+    highlight = _ass_color(SUBTITLE_HIGHLIGHT_COLOR)
+    header = (
+        "[Script Info]\n"
+        "ScriptType: v4.00+\n"
+        f"PlayResX: {REEL_SIZE[0]}\n"
+        f"PlayResY: {REEL_SIZE[1]}\n"
+        "WrapStyle: 2\n"
+        "ScaledBorderAndShadow: yes\n\n"
+        "[V4+ Styles]\n"
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, "
+        "Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, "
+        "MarginL, MarginR, MarginV, Encoding\n"
+        f"Style: Word,{SUBTITLE_FONT},{SUBTITLE_FONT_SIZE},{_ass_color(text_color)},{highlight},"
+        f"{_ass_color(stroke_color)},&H80000000,-1,0,0,0,100,100,0,0,1,{stroke_width},0,5,40,40,0,1\n\n"
+        "[Events]\n"
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+    )
+
+    events = []
+    pos = f"{{\\pos({SUBTITLE_POS[0]},{SUBTITLE_POS[1]})}}"
+    for line in group_subtitle_lines(words):
+        for i, active in enumerate(line):
+            # Hold the line until the next word starts so it does not flicker between words
+            end = line[i + 1]["start"] if i + 1 < len(line) else active["end"]
+            if end <= active["start"]:
+                end = active["end"]
+            text = " ".join(
+                f"{{\\1c{highlight}}}{tokens[id(w)]}{{\\r}}" if w is active else tokens[id(w)]
+                for w in line
+            )
+            events.append(f"Dialogue: 0,{_ass_time(active['start'])},{_ass_time(end)},Word,,0,0,0,,{pos}{text}")
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(header + "\n".join(events) + "\n")
+    return output_path
+
+
+def ass_filter(subtitles_path, offset=0.0):
+    """
+    FFmpeg filter string burning an ASS track. offset shifts the timeline for a segment that
+    starts at `offset` seconds into the reel.
+    """
+    path = subtitles_path.replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+    burn = f"ass=filename='{path}'"
+    if offset:
+        # fps= re-anchors the constant frame rate; without it the muxer drops frames after the PTS shift
+        return f"setpts=PTS+{offset:.3f}/TB,{burn},setpts=PTS-STARTPTS,fps={FPS}"
+    return burn
+
+
+def build_filtergraph(total_duration, top_kind, bottom_kind, top_bars=None, overlays=(),
+                      subtitles_path=None):
+    """
+    Builds the -filter_complex graph for the reel layout.
+    Input order: 0 = voiceover, 1 = top source, 2 = bottom source, then one input per branding overlay (x, y).
+    """
+    top_w, top_h = TOP_SIZE
+    bot_w, bot_h = BOTTOM_SIZE
+    chains = []
+
+    # --- Top Screen (60%) ---
+    if top_kind == "video":
+        top = "[1:v]"
+        if top_bars:
+            y1, y2 = top_bars
+            top += f"crop=iw:{y2 - y1}:0:{y1},"
+        # Zoom 1.02x as a source crop, then one stretch to 1080x1152; speed 1.01x
+        top += (f"crop=iw/{ZOOM_FACTOR}:ih/{ZOOM_FACTOR},scale={top_w}:{top_h},setsar=1,"
+                f"setpts=(PTS-STARTPTS)/{SPEED_FACTOR}")
+    elif top_kind == "slideshow":
+        # Pre-rendered Ken Burns clip, already 1080x1152 at FPS
+        top = "[1:v]setsar=1"
+    else:
+        top = "[1:v]null"
+    chains.append(f"{top},fps={FPS},trim=duration={total_duration:.3f},setpts=PTS-STARTPTS[top]")
+
+    # --- Bottom Screen (40%) ---
+    if bottom_kind == "video":
+        # apply_anti_copyright: speed 1.01x; cover fit + zoom 1.02x + center crop as one source crop and one scale
+        bot = (f"[2:v]setpts=(PTS-STARTPTS)/{SPEED_FACTOR},"
+               f"crop=w='min(iw,ih*{bot_w}/{bot_h})/{ZOOM_FACTOR}':h='min(ih,iw*{bot_h}/{bot_w})/{ZOOM_FACTOR}',"
+               f"scale={bot_w}:{bot_h},setsar=1")
+    else:
+        bot = "[2:v]null"
+    chains.append(f"{bot},fps={FPS},trim=duration={total_duration:.3f},setpts=PTS-STARTPTS[bot]")
+
+    chains.append("[top][bot]vstack=inputs=2[base]")
+    last = "[base]"
+
+    # --- Branding overlays (pre-scaled bounding boxes from the branding cache) ---
+    for i, (x, y) in enumerate(overlays):
+        chains.append(f"{last}[{3 + i}:v]overlay={x}:{y}[v_brand{i}]")
+        last = f"[v_brand{i}]"
+
+    subtitles = f"{ass_filter(subtitles_path)}," if subtitles_path else ""
+    chains.append(f"{last}{subtitles}setsar=1,format=yuv420p[vout]")
+    return ";".join(chains)
+
+
+def render_reel_ffmpeg(video_path, audio_path, viral_path, output_path, total_duration, slideshow=None,
+                       subtitles_path=None):
+    """
+    Renders the reel in a single FFmpeg pass (-filter_complex) instead of MoviePy compositing.
+    slideshow: poster/backdrop images for the top screen when there is no video (pre-rendered Ken Burns stage).
+    Returns output_path on success, None on failure.
+    """
+    slideshow_path = None
+    if not (video_path and os.path.exists(video_path)) and slideshow:
+        slideshow_path = render_ken_burns(slideshow, total_duration, f"{os.path.splitext(str(output_path))[0]}_slideshow.mp4")
+    try:
+        return _render_reel_ffmpeg(video_path, audio_path, viral_path, output_path, total_duration,
+                                   slideshow_path, subtitles_path)
+    finally:
+        if slideshow_path and os.path.exists(slideshow_path):
+            os.remove(slideshow_path)
+
+
+def _render_reel_ffmpeg(video_path, audio_path, viral_path, output_path, total_duration, slideshow_path, subtitles_path):
+    logger.info("Rendering final video with FFmpeg filtergraph...")
+    inputs = ["-i", audio_path]
+
+    # Top source
+    top_bars = None
+    if video_path and os.path.exists(video_path):
+        top_kind = "video"
+        top_bars = probe_black_bars(video_path)
+        if top_bars:
+            logger.info(f"Cropping: Top={top_bars[0]}, Bottom={top_bars[1]}")
+        inputs += ["-stream_loop", "-1", "-i", video_path]
+    elif slideshow_path:
+        top_kind = "slideshow"
+        inputs += ["-i", slideshow_path]
+    else:
+        top_kind = "color"
+        inputs += ["-f", "lavfi", "-i", f"color=c=black:s={TOP_SIZE[0]}x{TOP_SIZE[1]}:r={FPS}"]
+
+    # Bottom source
+    if viral_path and os.path.exists(viral_path):
+        bottom_kind = "video"
+        inputs += ["-stream_loop", "-1", "-i", viral_path]
+    else:
+        bottom_kind = "color"
+        inputs += ["-f", "lavfi", "-i", f"color=c=0x141414:s={BOTTOM_SIZE[0]}x{BOTTOM_SIZE[1]}:r={FPS}"]
+
+    overlays = export_branding_overlays()
+    for path, _, _ in overlays:
+        inputs += ["-i", path]
+
+    graph = build_filtergraph(total_duration, top_kind, bottom_kind, top_bars=top_bars,
+                              overlays=[(x, y) for _, x, y in overlays], subtitles_path=subtitles_path)
+
+    cmd = [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        *inputs,
+        "-filter_complex", graph,
+        "-map", "[vout]", "-map", "0:a",
+        "-c:v", "libx264", "-preset", "medium", "-r", str(FPS),
+        "-c:a", "aac",
+        "-t", f"{total_duration:.3f}",
+        str(output_path)
+    ]
+
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except Exception as e:
+        logger.warning(f"FFmpeg render could not start: {e}")
+        return None
+
+    if result.returncode != 0 or not os.path.exists(output_path) or os.path.getsize(output_path) < 1000:
+        logger.warning(f"FFmpeg render failed (code {result.returncode}): {result.stderr[-1000:]}")
+        return None
+
+    return output_path
+
+
+def segment_bounds(total_duration, segments, fps=FPS):
+    """Splits [0, total_duration] into contiguous (start, end) ranges aligned to the frame grid."""
+    total_frames = int(round(total_duration * fps))
+    segments = max(1, min(segments, total_frames))
+    cuts = [round(i * total_frames / segments) for i in range(segments + 1)]
+    return [(cuts[i] / fps, cuts[i + 1] / fps) for i in range(segments) if cuts[i + 1] > cuts[i]]
+
+
+def concat_segments(segment_paths, audio_path, output_path):
+    """Joins video-only segments with the concat demuxer (stream copy) and muxes the voiceover once."""
+    list_path = f"{os.path.splitext(str(output_path))[0]}_segments.txt"
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in segment_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+
+    cmd = [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-i", audio_path,
+        "-map", "0:v", "-map", "1:a",
+        "-c:v", "copy", "-c:a", "aac",
+        "-shortest",
+        str(output_path)
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    finally:
+        try: os.remove(list_path)
+        except OSError: pass
+
+    if result.returncode != 0 or not os.path.exists(output_path) or os.path.getsize(output_path) < 1000:
+        logger.warning(f"Segment concat failed (code {result.returncode}): {result.stderr[-1000:]}")
+        return None
+
+    return output_path
+
+
+# -----------------------------------------------------------------------------
+# Decoded-Frame Cache (looped short sources)
+# -----------------------------------------------------------------------------
+
+class FrameCache:
+    """
+    A short source that has to loop, decoded once and warped to the layer size (fused zoom/crop) into a
+    compact uint8 memory-mapped array. Looped frames are served by index, with no re-decode and no seeks.
+    The backing file is anonymous (TemporaryFile) and disappears when the cache is closed or collected;
+    a shared cache uses a named file instead, which worker processes map read-only via attach(spec), so
+    N render segments share one decode and one set of page-cache pages.
+    """
+
+    def __init__(self, frames, count, src_fps, backing, path=None):
+        self.frames = frames
+        self.count = count
+        self.src_fps = src_fps
+        self._backing = backing
+        self.path = path
+
+    @classmethod
+    def build(cls, path, size, mode, total_duration, crop_rows=None, rgb=False, budget_mb=None, shared=False):
+        """
+        Returns a FrameCache, or None when the source does not loop within total_duration (nothing to
+        gain) or its decoded size exceeds budget_mb (default FRAME_CACHE_BUDGET_MB). The budget is per reel:
+        the second source of a reel gets what the first one's cache (mb) left over.
+        shared=True backs it with a named file so other processes can attach() to it.
+        """
+        budget_mb = FRAME_CACHE_BUDGET_MB if budget_mb is None else budget_mb
+        cap = cv2.VideoCapture(path)
+        try:
+            if not cap.isOpened():
+                return None
+            src_fps = cap.get(cv2.CAP_PROP_FPS) or FPS
+            estimate = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            if estimate <= 0 or estimate / src_fps / SPEED_FACTOR >= total_duration:
+                return None
+            capacity = estimate + 2  # CAP_PROP_FRAME_COUNT is only an estimate for some containers
+            frame_bytes = size[0] * size[1] * 3
+            if capacity * frame_bytes > budget_mb * 2**20:
+                logger.info(f"Frame cache skipped for {path}: {capacity * frame_bytes / 2**20:.0f}MB > {budget_mb:.0f}MB budget")
+                return None
+
+            src_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            src_h = crop_rows[1] - crop_rows[0] if crop_rows else int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            matrix = fused_affine(src_w, src_h, size, mode)
+
+            if shared:
+                backing = tempfile.NamedTemporaryFile(prefix="frames_", suffix=".u8", delete=False)
+            else:
+                backing = tempfile.TemporaryFile(prefix="frames_", suffix=".u8")
+            backing.truncate(capacity * frame_bytes)
+            frames = np.memmap(backing, dtype=np.uint8, mode="r+", shape=(capacity, size[1], size[0], 3))
+            count = 0
+            frame = None
+            while count < capacity:
+                ret, frame = cap.read(frame)
+                if not ret:
+                    break
+                src = frame[crop_rows[0]:crop_rows[1]] if crop_rows else frame
+                apply_affine(src, matrix, size, dst=frames[count])
+                if rgb:
+                    cv2.cvtColor(frames[count], cv2.COLOR_BGR2RGB, dst=frames[count])
+                count += 1
+            if count == 0:
+                backing.close()
+                if shared:
+                    os.remove(backing.name)
+                return None
+            logger.info(f"Frame cache: {count} frames of {os.path.basename(path)} at {size[0]}x{size[1]} "
+                        f"({count * frame_bytes / 2**20:.0f}MB)")
+            if shared:
+                frames.flush()
+            return cls(frames, count, src_fps, backing, path=backing.name if shared else None)
+        finally:
+            cap.release()
+
+    @property
+    def mb(self):
+        """Size reserved by the backing file (full capacity, not just the decoded frames), in MB."""
+        return self.frames.nbytes / 2**20
+
+    def spec(self):
+        """Picklable description of a shared cache, for attach() in another process."""
+        return (self.path, self.count, self.src_fps, self.frames.shape[1:])
+
+    @classmethod
+    def attach(cls, spec):
+        """Maps a shared cache built by another process, read-only (no decode, no copy)."""
+        path, count, src_fps, frame_shape = spec
+        frames = np.memmap(path, dtype=np.uint8, mode="r", shape=(count, *frame_shape))
+        return cls(frames, count, src_fps, None)
+
+    def frame(self, out_index):
+        """Frame for output frame out_index (1.01x speed, looped)."""
+        return self.frames[int(out_index * SPEED_FACTOR * self.src_fps / FPS) % self.count]
+
+    def frame_at(self, t):
+        """Frame for output time t in seconds (MoviePy frame_function)."""
+        return self.frames[int(t * SPEED_FACTOR * self.src_fps + 1e-6) % self.count]
+
+    def close(self):
+        self.frames = None
+        if self._backing is not None:
+            self._backing.close()
+            if self.path:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+
+
+# -----------------------------------------------------------------------------
+# OpenCV Compositor (preallocated buffer -> raw pipe to FFmpeg)
+# -----------------------------------------------------------------------------
+
+class _VideoLayer:
+    """Decodes a looped, 1.01x sped-up source with OpenCV and warps each frame straight into dst."""
+
+    def __init__(self, path, dst, mode, total_duration, crop_rows=None, budget_mb=None):
+        self.dst = dst
+        self.cache = FrameCache.build(path, (dst.shape[1], dst.shape[0]), mode, total_duration,
+                                      crop_rows=crop_rows, budget_mb=budget_mb)
+        self.cap = None
+        if self.cache:
+            return
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open {path}")
+        self.src_fps = self.cap.get(cv2.CAP_PROP_FPS) or FPS
+        self.crop_rows = crop_rows
+        src_w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        src_h = crop_rows[1] - crop_rows[0] if crop_rows else int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.size = (dst.shape[1], dst.shape[0])
+        self.matrix = fused_affine(src_w, src_h, self.size, mode)
+        self.frame = None       # decode buffer, reused by cap.read()
+        self.pos = -1           # index of the frame currently in self.frame
+        self.frame_count = None # learned when the source runs out and loops
+
+    def _rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.pos = -1
+
+    def _seek(self, idx):
+        if idx < self.pos:
+            self._rewind()
+        while self.pos < idx - 1:
+            if not self.cap.grab():
+                return False
+            self.pos += 1
+        ret, frame = self.cap.read(self.frame)
+        if not ret:
+            return False
+        self.frame = frame
+        self.pos += 1
+        return True
+
+    def render(self, out_index):
+        if self.cache:
+            self.dst[...] = self.cache.frame(out_index)
+            return
+        idx = int(out_index * SPEED_FACTOR * self.src_fps / FPS)
+        if self.frame_count:
+            idx %= self.frame_count
+        if idx != self.pos and not self._seek(idx):
+            # End of source: remember its length and loop (vfx.Loop equivalent)
+            self.frame_count = max(self.pos + 1, 1)
+            self._rewind()
+            if not self._seek(idx % self.frame_count):
+                raise RuntimeError("Source video could not be decoded")
+
+        src = self.frame
+        if self.crop_rows:
+            src = src[self.crop_rows[0]:self.crop_rows[1]]
+        apply_affine(src, self.matrix, self.size, dst=self.dst)
+
+    def close(self):
+        if self.cap:
+            self.cap.release()
+        if self.cache:
+            self.cache.close()
+
+
+class _SlideshowLayer:
+    """Poster / backdrop fallback: Ken Burns slideshow rendered straight into dst (no intermediate clip)."""
+
+    def __init__(self, image_paths, dst, total_duration):
+        self.slideshow = KenBurns(image_paths, (dst.shape[1], dst.shape[0]), total_duration)
+        self.dst = dst
+
+    def render(self, out_index):
+        self.slideshow.render(out_index, self.dst)
+
+    def close(self):
+        pass
+
+
+class _ColorLayer:
+    def __init__(self, dst, color):
+        self.dst = dst
+        self.color = color
+
+    def render(self, out_index):
+        # Refilled every frame because branding is blended into the same buffer
+        self.dst[...] = self.color
+
+    def close(self):
+        pass
+
+
+def render_reel_compositor(video_path, audio_path, viral_path, output_path, total_duration, slideshow=None,
+                           subtitles_path=None):
+    """
+    Renders the reel with an OpenCV compositor. Every layer is written in place into one preallocated
+    1080x1920 BGR buffer, which is streamed straight into an `ffmpeg -f rawvideo -i -` pipe.
+    Returns output_path on success, None on failure.
+    """
+    logger.info("Rendering final video with OpenCV compositor (raw pipe to FFmpeg)...")
+    buffer = np.zeros((REEL_SIZE[1], REEL_SIZE[0], 3), dtype=np.uint8)
+    top_view = buffer[:TOP_SIZE[1]]
+    bottom_view = buffer[TOP_SIZE[1]:]
+    layers = []
+    cache_budget_mb = FRAME_CACHE_BUDGET_MB  # Shared by both looped sources of this reel
+
+    try:
+        # --- Top Screen (60%) ---
+        if video_path and os.path.exists(video_path):
+            top_bars = probe_black_bars(video_path)
+            if top_bars:
+                logger.info(f"Cropping: Top={top_bars[0]}, Bottom={top_bars[1]}")
+            layers.append(_VideoLayer(video_path, top_view, "stretch", total_duration, crop_rows=top_bars,
+                                      budget_mb=cache_budget_mb))
+            if layers[-1].cache:
+                cache_budget_mb -= layers[-1].cache.mb
+        elif slideshow:
+            layers.append(_SlideshowLayer(slideshow, top_view, total_duration))
+        else:
+            layers.append(_ColorLayer(top_view, (0, 0, 0)))
+
+        # --- Bottom Screen (40%) ---
+        if viral_path and os.path.exists(viral_path):
+            layers.append(_VideoLayer(viral_path, bottom_view, "cover", total_duration, budget_mb=cache_budget_mb))
+        else:
+            layers.append(_ColorLayer(bottom_view, (20, 20, 20)))
+
+        branding = load_branding_layer(bgr=True)
+
+        cmd = [
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{REEL_SIZE[0]}x{REEL_SIZE[1]}", "-r", str(FPS), "-i", "-",
+            "-i", audio_path,
+            "-map", "0:v", "-map", "1:a",
+            *(["-vf", ass_filter(subtitles_path)] if subtitles_path else []),
+            "-c:v", "libx264", "-preset", "medium", "-pix_fmt", "yuv420p",
+            "-c:a", "aac",
+            "-shortest",
+            str(output_path)
+        ]
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            for i in range(int(round(total_duration * FPS))):
+                for layer in layers:
+                    layer.render(i)
+                if branding:
+                    apply_branding(buffer, branding)
+                proc.stdin.write(buffer.data)
+            proc.stdin.close()
+            stderr = proc.stderr.read().decode(errors="ignore")
+            proc.wait()
+        except Exception:
+            proc.kill()
+            proc.wait()
+            raise
+    except Exception as e:
+        logger.warning(f"Compositor render failed: {e}")
+        return None
+    finally:
+        for layer in layers:
+            layer.close()
+
+    if proc.returncode != 0 or not os.path.exists(output_path) or os.path.getsize(output_path) < 1000:
+        logger.warning(f"Compositor render failed (code {proc.returncode}): {stderr[-1000:]}")
+        return None
+
+    return output_path
+
+
+# Native render backends selectable via RENDER_BACKEND (MoviePy is the fallback)
+RENDERERS = {
+    "ffmpeg": render_reel_ffmpeg,
+    "compositor": render_reel_compositor,
+}
@@ -0,0 +1,31 @@
+import main
+import tmdb_client
+
+
+def _fake_tmdb(monkeypatch, requested):
+    def get_json(path, params=None, timeout=None):
+        requested.append(path)
+        return {"backdrops": [{"file_path": "/a.jpg", "vote_average": 5.0}]}
+
+    monkeypatch.setattr(tmdb_client, "get_json", get_json)
+    monkeypatch.setattr(main, "download_file_with_retry", lambda url, dest: True)
+
+
+def test_series_catalog_item_uses_tv_images_endpoint(monkeypatch):
+    requested = []
+    _fake_tmdb(monkeypatch, requested)
+    item = {"Title": "Dark", "Type": "Series", "tmdb_id": 70523}
+
+    paths = main.get_backdrops(item["tmdb_id"], item["Type"].lower())
+
+    assert requested == ["/tv/70523/images"]
+    assert len(paths) == 1
+
+
+def test_movie_catalog_item_uses_movie_images_endpoint(monkeypatch):
+    requested = []
+    _fake_tmdb(monkeypatch, requested)
+
+    main.get_backdrops(27205, "Movie".lower())
+
+    assert requested == ["/movie/27205/images"]
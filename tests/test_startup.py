@@ -0,0 +1,23 @@
+import os
+import sys
+import subprocess
+
+import benchmark
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Loaded lazily at their use sites; an early exit (not this server's turn) must not pay for any of them
+HEAVY_MODULES = ("torch", "moviepy", "cv2", "whisper", "playwright")
+
+
+def test_import_main_is_cold_and_light():
+    code = (
+        "import sys, main\n"
+        f"print('HEAVY:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_DIR,
+                          capture_output=True, text=True, check=True)
+
+    loaded = [line for line in proc.stdout.splitlines() if line.startswith("HEAVY:")][-1][len("HEAVY:"):]
+    assert loaded == ""
+    total_us = next(us for name, us in benchmark.parse_importtime(proc.stderr) if name.strip() == "main")
+    assert total_us / 1e6 <= benchmark.STARTUP_BUDGET_S
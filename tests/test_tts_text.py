@@ -0,0 +1,27 @@
+import pytest
+
+import main
+
+# Golden outputs captured from the original sequential implementation of the rewriter
+TTS_GOLDEN = [
+    ('قِصَّتُنَا الْيَوْم عَنْ فيلم أكشن ، المقدم 2024.',
+     'قِصَّتُنَا الْيَوْم عَنْ فيلم أَكْشَنَ ، الْمُقَدَّم أَلْفَيْنِ وَأَرْبَعَةٍ وَعِشْرُونَ.'),
+    ('في عام 1973 كان المستوى الأمني مختلفاً، والنمر يراقب الممر.',
+     'في عام أَلْفٍ وَتُسْعُمِائَةٍ وَثَلَاثَةٍ وَسَبْعُونَ كانَ الْمُسْتَوَى الْأمني مختلفاً، والنّمر يراقب الْممر.'),
+    ('**القصة:** شاب يكتشف أصل عائلته في الليلة الأخرى - مع 10 أصدقاء!',
+     'الْقصة شاب يكتشف أَصْل عائلته في اللّيلة الْأُخْرَى مع عَشَرَة أصدقاء!'),
+    ('لِمُشَاهَدَتِ الْفِيلْمِ كَامِلًا وَبِدُونِ إعلانات ، مُشَاهَدَةٌ مُمْتِعَةٌ.',
+     'لِمُشَاهَدَتِ الْفِيلْمِ كَامِلًا وَبِدُونِ إِعْلَانات ، مُشَاهَدَةٌ مُمْتِعَةٌ.'),
+    ('مزارعٌ بسيط يعيش في الريف 😀 ويحلم بالسفر إلى الشمس',
+     'مزارع بسيط يعيش في الرّيف ويحلم بالسّفر إلى الشّمس'),
+    ('النّور يسطع على النمر والنهر الكبير',
+     'النّور يسطع على النِّمر والنهر الْكبير'),
+    ('  "الأكشن"   #رعب   \'مستوي اخرى\' ؟ ',
+     'الْأَكْشَن رعب مُسْتَوَى أُخْرَى ؟'),
+]
+
+
+@pytest.mark.parametrize("text, expected", TTS_GOLDEN)
+def test_clean_text_for_tts_matches_golden_output(text, expected):
+    main.clean_text_for_tts.cache_clear()
+    assert main.clean_text_for_tts(text) == expected
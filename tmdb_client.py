@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from contextlib import closing
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# TMDB search over one pooled keep-alive session (one TCP+TLS handshake per connection, not per title)
+TMDB_API_KEY = os.environ.get("TMDB_API_KEY")
+TMDB_BASE_URL = "https://api.themoviedb.org/3"
+TMDB_CONCURRENCY = int(os.environ.get("TMDB_CONCURRENCY", "16"))
+TMDB_TIMEOUT_S = float(os.environ.get("TMDB_TIMEOUT_S", "10"))
+
+# Persistent response cache keyed by endpoint + normalised params (api_key excluded)
+TMDB_CACHE_DB = os.path.join("cache", "tmdb.db")
+TMDB_SEARCH_TTL_H = float(os.environ.get("TMDB_SEARCH_TTL_H", "24"))
+TMDB_DETAILS_TTL_DAYS = float(os.environ.get("TMDB_DETAILS_TTL_DAYS", "30"))
+TMDB_NEGATIVE_TTL_H = float(os.environ.get("TMDB_NEGATIVE_TTL_H", "6"))
+# Commit-friendly JSON copy of the cache so a cold runner starts warm ("" disables)
+TMDB_SNAPSHOT = os.environ.get("TMDB_SNAPSHOT", "tmdb_snapshot.json")
+
+# (path prefix, TTL seconds); anything else is a details-like endpoint (/movie/{id}, /videos, /images)
+_TTLS = (
+    ("/search/", TMDB_SEARCH_TTL_H * 3600),
+    ("/trending/", 3600),
+)
+
+EMPTY_RESULT = (0, [], "", "", "N/A")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key        TEXT PRIMARY KEY,
+    status     INTEGER NOT NULL,
+    body       TEXT NOT NULL,
+    etag       TEXT,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+_stats = {"hits": 0, "misses": 0, "revalidated": 0, "stale": 0}
+_snapshot_loaded = False
+_snapshot_lock = threading.Lock()
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide requests.Session whose connection pool is sized for TMDB_CONCURRENCY parallel lookups."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(TMDB_CONCURRENCY, 1))
+            _session.mount("https://", adapter)
+        return _session
+
+
+def _connect():
+    global _snapshot_loaded
+    os.makedirs(os.path.dirname(TMDB_CACHE_DB), exist_ok=True)
+    conn = sqlite3.connect(TMDB_CACHE_DB, timeout=10)
+    conn.execute(_SCHEMA)
+    if not _snapshot_loaded:
+        with _snapshot_lock:
+            if not _snapshot_loaded:
+                _load_snapshot(conn)
+                _snapshot_loaded = True
+    return conn
+
+
+def _load_snapshot(conn):
+    """Seeds the cache from the committed snapshot; entries already in the database win."""
+    if not TMDB_SNAPSHOT or not os.path.exists(TMDB_SNAPSHOT):
+        return
+    try:
+        with open(TMDB_SNAPSHOT, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                [(e["key"], e["status"], json.dumps(e["body"], ensure_ascii=False), e.get("etag"),
+                  e["fetched_at"], e["expires_at"]) for e in entries],
+            )
+    except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+        logger.warning(f"TMDB snapshot load failed: {e}")
+
+
+def save_snapshot(path=None):
+    """Writes every unexpired entry to the snapshot file (sorted, one entry per line for small diffs)."""
+    path = path or TMDB_SNAPSHOT
+    if not path:
+        return None
+    try:
+        with closing(_connect()) as conn:
+            rows = conn.execute(
+                "SELECT key, status, body, etag, fetched_at, expires_at FROM responses "
+                "WHERE expires_at > ? ORDER BY key", (time.time(),),
+            ).fetchall()
+        lines = [json.dumps({"key": k, "status": st, "body": json.loads(b), "etag": et,
+                             "fetched_at": round(fa, 1), "expires_at": round(ea, 1)},
+                            ensure_ascii=False, sort_keys=True) for k, st, b, et, fa, ea in rows]
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("[\n" + ",\n".join(lines) + "\n]\n")
+        os.replace(tmp_path, path)
+        logger.info(f"TMDB snapshot saved: {len(rows)} entries -> {path}")
+        return path
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"TMDB snapshot save failed: {e}")
+        return None
+
+
+def cache_key(path, params=None):
+    """Endpoint plus sorted params without api_key; free-text queries are case/whitespace-normalised."""
+    norm = {}
+    for name, value in (params or {}).items():
+        if name == "api_key" or value is None:
+            continue
+        value = " ".join(str(value).split())
+        norm[name] = value.lower() if name == "query" else value
+    return f"{path}?{urlencode(sorted(norm.items()))}" if norm else path
+
+
+def _ttl(path, status, body):
+    if status == 404 or (isinstance(body, dict) and body.get("results") == []):
+        return TMDB_NEGATIVE_TTL_H * 3600
+    for prefix, ttl in _TTLS:
+        if path.startswith(prefix):
+            return ttl
+    return TMDB_DETAILS_TTL_DAYS * 86400
+
+
+def _lookup(key):
+    try:
+        with closing(_connect()) as conn:
+            return conn.execute("SELECT status, body, etag, expires_at FROM responses WHERE key = ?",
+                                (key,)).fetchone()
+    except sqlite3.Error as e:
+        logger.warning(f"TMDB cache read failed: {e}")
+        return None
+
+
+def _store(key, path, status, body, etag):
+    now = time.time()
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                         (key, status, json.dumps(body, ensure_ascii=False), etag, now,
+                          now + _ttl(path, status, body)))
+    except sqlite3.Error as e:
+        logger.warning(f"TMDB cache store failed: {e}")
+
+
+def _touch(key, path, status, body):
+    now = time.time()
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute("UPDATE responses SET fetched_at = ?, expires_at = ? WHERE key = ?",
+                         (now, now + _ttl(path, status, body), key))
+    except sqlite3.Error as e:
+        logger.warning(f"TMDB cache refresh failed: {e}")
+
+
+def get_json(path, params=None, timeout=TMDB_TIMEOUT_S):
+    """
+    GET {TMDB_BASE_URL}{path} through the response cache. Returns the decoded JSON, or None for a 404,
+    a missing key, or a failed request with nothing cached. Expired entries are revalidated with
+    If-None-Match; on network/server errors a stale entry is served rather than nothing.
+    """
+    key = cache_key(path, params)
+    row = _lookup(key)
+    if row and row[3] > time.time():
+        _stats["hits"] += 1
+        return json.loads(row[1]) if row[0] == 200 else None
+    if not TMDB_API_KEY:
+        return None
+
+    _stats["misses"] += 1
+    headers = {"If-None-Match": row[2]} if row and row[2] else {}
+    try:
+        res = get_session().get(f"{TMDB_BASE_URL}{path}", params={**(params or {}), "api_key": TMDB_API_KEY},
+                                headers=headers, timeout=timeout)
+        if res.status_code == 304 and row:
+            _stats["revalidated"] += 1
+            body = json.loads(row[1])
+            _touch(key, path, row[0], body)
+            return body if row[0] == 200 else None
+        if res.status_code in (200, 404):
+            body = res.json() if res.status_code == 200 else {}
+            _store(key, path, res.status_code, body, res.headers.get("ETag"))
+            return body if res.status_code == 200 else None
+        logger.warning(f"TMDB {path} returned {res.status_code}")
+    except Exception as e:
+        logger.warning(f"TMDB {path} request failed: {str(e).replace(TMDB_API_KEY, '***')}")
+    if row and row[0] == 200:
+        _stats["stale"] += 1
+        return json.loads(row[1])
+    return None
+
+
+def stats():
+    """Cache counters for this process."""
+    lookups = _stats["hits"] + _stats["misses"]
+    return {**_stats, "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else 0.0}
+
+
+def search(title, content_type, timeout=TMDB_TIMEOUT_S):
+    """
+    Best TMDB match for title as (popularity, genre_ids, overview, poster_path, id).
+    Returns EMPTY_RESULT when there is no key, no match, or the request fails.
+    """
+    search_type = "movie" if content_type.lower() == "movie" else "tv"
+    try:
+        res = get_json(f"/search/{search_type}", {"query": title}, timeout=timeout) or {}
+        if res.get('results'):
+            best_match = res['results'][0]
+            return (
+                best_match.get('popularity', 0),
+                best_match.get('genre_ids', []),
+                best_match.get('overview', ''),
+                best_match.get('poster_path', ''),
+                best_match.get('id', 'N/A')
+            )
+    except Exception as e:
+        logger.error(f"TMDB lookup failed for {title}: {e}")
+
+    return EMPTY_RESULT
+
+
+async def search_many(items, concurrency=None, deadline=None):
+    """
+    Looks up [(title, content_type)] concurrently (at most `concurrency` requests in flight) and returns
+    results in input order. A lookup that misses its deadline counts as EMPTY_RESULT.
+    """
+    concurrency = max(concurrency or TMDB_CONCURRENCY, 1)
+    semaphore = asyncio.Semaphore(concurrency)
+    deadline = deadline or TMDB_TIMEOUT_S
+    loop = asyncio.get_running_loop()
+    # Own pool: the loop's default executor is sized from the CPU count, which caps I/O parallelism on small hosts
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="tmdb")
+
+    async def _one(title, content_type):
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(loop.run_in_executor(pool, search, title, content_type, deadline), deadline + 1)
+            except asyncio.TimeoutError:
+                logger.warning(f"TMDB lookup timed out for {title}")
+                return EMPTY_RESULT
+
+    try:
+        return await asyncio.gather(*(_one(title, content_type) for title, content_type in items))
+    finally:
+        pool.shutdown(wait=False)
@@ -0,0 +1,67 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+# Persistent Whisper transcription store keyed by (YouTube video ID, model size)
+TRANSCRIPT_CACHE_DB = os.path.join("cache", "transcripts.db")
+TRANSCRIPT_CACHE_TTL_DAYS = float(os.environ.get("TRANSCRIPT_CACHE_TTL_DAYS", "90"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    video_id   TEXT NOT NULL,
+    model      TEXT NOT NULL,
+    text       TEXT NOT NULL,
+    segments   TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (video_id, model)
+)
+"""
+
+
+def _connect():
+    os.makedirs(os.path.dirname(TRANSCRIPT_CACHE_DB), exist_ok=True)
+    conn = sqlite3.connect(TRANSCRIPT_CACHE_DB, timeout=10)
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def get(video_id, model):
+    """Returns {"text", "segments", "created_at"} for a fresh entry, or None (missing, expired or unreadable)."""
+    try:
+        with closing(_connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT text, segments, created_at FROM transcripts WHERE video_id = ? AND model = ?",
+                (video_id, model),
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.warning(f"Transcript cache read failed: {e}")
+        return None
+    if not row:
+        return None
+    text, segments, created_at = row
+    if time.time() - created_at > TRANSCRIPT_CACHE_TTL_DAYS * 86400:
+        return None
+    return {"text": text, "segments": json.loads(segments), "created_at": created_at}
+
+
+def put(video_id, model, text, segments=()):
+    """Stores (or refreshes) a transcription. Segments are trimmed to start/end/text."""
+    rows = [{"start": round(float(s["start"]), 2), "end": round(float(s["end"]), 2), "text": s["text"].strip()}
+            for s in segments or ()]
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?)",
+                (video_id, model, text, json.dumps(rows, ensure_ascii=False), time.time()),
+            )
+            conn.execute("DELETE FROM transcripts WHERE created_at < ?",
+                         (time.time() - TRANSCRIPT_CACHE_TTL_DAYS * 86400,))
+        return True
+    except sqlite3.Error as e:
+        logger.warning(f"Transcript cache store failed: {e}")
+        return False
@@ -0,0 +1,91 @@
+import bisect
+import logging
+import subprocess
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Whisper's native input: 16 kHz mono float32
+SAMPLE_RATE = 16000
+# Speech detection: 20 ms frames judged in 1 s blocks
+VAD_FRAME_S = 0.02
+VAD_BLOCK_S = 1.0
+VAD_SILENCE_DB = -45.0     # Frames quieter than this (dBFS) count as silence
+VAD_MODULATION_DB = 4.0    # Syllabic energy swing in the voice band; sustained music stays flatter
+VAD_PAD_S = 0.25
+VAD_MERGE_GAP_S = 0.5
+
+
+def decode_audio(source, sample_rate=SAMPLE_RATE, timeout=300):
+    """Decodes any FFmpeg input (local file or stream URL) to mono float32 PCM through a pipe, no temp file."""
+    cmd = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", source, "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "f32le", "-",
+    ]
+    proc = subprocess.run(cmd, capture_output=True, timeout=timeout)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg audio decode failed: {proc.stderr.decode(errors='ignore').strip()[-300:]}")
+    return np.frombuffer(proc.stdout, dtype=np.float32).copy()
+
+
+def speech_windows(audio, sample_rate=SAMPLE_RATE):
+    """
+    Energy + modulation speech detector. Returns [(start_s, end_s)] of stretches that likely hold dialogue.
+    A 1 s block is kept when enough of its frames are above the silence floor and the voice-band
+    (300-3400 Hz) energy swings like syllables do; silence and steady music beds are dropped.
+    """
+    hop = int(sample_rate * VAD_FRAME_S)
+    n_frames = len(audio) // hop
+    if n_frames == 0:
+        return []
+    frames = audio[:n_frames * hop].reshape(n_frames, hop)
+    rms_db = 20 * np.log10(np.sqrt(np.mean(frames ** 2, axis=1)) + 1e-9)
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(hop), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(hop, 1.0 / sample_rate)
+    band_db = 10 * np.log10(spectrum[:, (freqs >= 300) & (freqs <= 3400)].sum(axis=1) + 1e-10)
+
+    per_block = int(round(VAD_BLOCK_S / VAD_FRAME_S))
+    windows = []
+    for first in range(0, n_frames, per_block):
+        loud = rms_db[first:first + per_block] > VAD_SILENCE_DB
+        if loud.mean() < 0.3:
+            continue
+        if np.std(band_db[first:first + per_block][loud]) < VAD_MODULATION_DB:
+            continue
+        start = max(first * VAD_FRAME_S - VAD_PAD_S, 0.0)
+        end = min((first + per_block) * VAD_FRAME_S + VAD_PAD_S, len(audio) / sample_rate)
+        if windows and start - windows[-1][1] <= VAD_MERGE_GAP_S:
+            windows[-1] = (windows[-1][0], end)
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def transcribe_windows(model, audio, windows, sample_rate=SAMPLE_RATE, gap_s=0.2, **options):
+    """
+    Runs Whisper once over the speech windows spliced together (short silent gaps between them) and maps
+    segment timestamps back to the original timeline. Returns (text, segments).
+    """
+    gap = np.zeros(int(gap_s * sample_rate), dtype=np.float32)
+    pieces, spliced_starts, offsets = [], [], []
+    pos = 0
+    for start, end in windows:
+        a, b = int(start * sample_rate), int(end * sample_rate)
+        pieces += [audio[a:b], gap]
+        spliced_starts.append(pos / sample_rate)
+        offsets.append((start, (b - a) / sample_rate))
+        pos += (b - a) + len(gap)
+    if not pieces:
+        return "", []
+
+    result = model.transcribe(np.concatenate(pieces), **options)
+
+    def to_original(t):
+        i = max(bisect.bisect_right(spliced_starts, t) - 1, 0)
+        start, length = offsets[i]
+        return round(start + min(t - spliced_starts[i], length), 2)
+
+    segments = [{**s, "start": to_original(s["start"]), "end": to_original(s["end"])}
+                for s in result.get("segments", [])]
+    return result.get("text", "").strip(), segments
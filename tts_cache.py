@@ -0,0 +1,97 @@
+import os
+import json
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Content-addressed cache of synthesised Edge-TTS segments (intro/outro repeat on every reel)
+TTS_CACHE_DIR = os.path.join("cache", "tts")
+TTS_CACHE_MAX_MB = int(os.environ.get("TTS_CACHE_MAX_MB", "200"))
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+
+def cache_key(text, voice, rate):
+    """sha256 of the cleaned segment text, voice and rate."""
+    return hashlib.sha256("\x1f".join((text, voice, rate)).encode("utf-8")).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(TTS_CACHE_DIR, f"{key}.tts")
+
+
+def get(key):
+    """
+    Returns (audio_bytes, meta) for a cached segment and marks it recently used, or None on a miss.
+    Entry layout: one JSON line (meta, e.g. word boundaries) followed by the encoded audio.
+    """
+    path = _entry_path(key)
+    try:
+        with open(path, "rb") as f:
+            meta = json.loads(f.readline())
+            data = f.read()
+    except (OSError, ValueError):
+        data = None
+    if data:
+        try:
+            os.utime(path)  # mtime doubles as the LRU timestamp
+        except OSError:
+            pass
+        _stats["hits"] += 1
+        return data, meta
+    _stats["misses"] += 1
+    return None
+
+
+def put(key, data, meta=None):
+    """Stores a freshly synthesised segment (encoded bytes + JSON meta), then evicts down to the size bound."""
+    try:
+        os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        path = _entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(meta, ensure_ascii=False).encode("utf-8") + b"\n")
+            f.write(data)
+        os.replace(tmp_path, path)  # Atomic: readers never see a partial file
+        _stats["stores"] += 1
+        evict()
+        return path
+    except OSError as e:
+        logger.warning(f"TTS cache store failed: {e}")
+        return None
+
+
+def evict(max_mb=None):
+    """Removes least recently used entries (oldest mtime first) until the cache fits max_mb."""
+    max_bytes = (TTS_CACHE_MAX_MB if max_mb is None else max_mb) * 2**20
+    try:
+        entries = []
+        for name in os.listdir(TTS_CACHE_DIR):
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(TTS_CACHE_DIR, name)
+            st = os.stat(path)
+            entries.append((st.st_mtime, st.st_size, path))
+    except FileNotFoundError:
+        return
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            _stats["evictions"] += 1
+        except OSError:
+            pass
+
+
+def stats():
+    """Hit/miss counters for this process, plus the current on-disk size."""
+    size = 0
+    if os.path.isdir(TTS_CACHE_DIR):
+        size = sum(os.path.getsize(os.path.join(TTS_CACHE_DIR, n)) for n in os.listdir(TTS_CACHE_DIR))
+    lookups = _stats["hits"] + _stats["misses"]
+    return {**_stats, "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+            "size_mb": round(size / 2**20, 2)}
@@ -0,0 +1,88 @@
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Process-wide Whisper model registry: each size is loaded once and reused across calls and cycles
+WHISPER_PRELOAD = os.environ.get("WHISPER_PRELOAD", "True") == "True"
+# Intra-op threads for Whisper inference (main.py pins OMP/BLAS to 1 thread for the render pools)
+WHISPER_THREADS = int(os.environ.get("WHISPER_THREADS", str(os.cpu_count() or 1)))
+
+_models = {}
+_loading = {}  # (size, int8) -> Event, set when an in-flight load finishes (or fails)
+_lock = threading.Lock()
+
+
+def _quantize(model):
+    """Dynamic int8 quantisation of every Linear layer (weights int8, activations quantised on the fly)."""
+    import torch
+    from torch import nn
+    # Whisper's own Linear subclass only casts dtypes in forward; swap in plain nn.Linear so
+    # quantize_dynamic (exact type match) picks the layers up
+    for parent in list(model.modules()):
+        for name, child in parent.named_children():
+            if isinstance(child, nn.Linear) and type(child) is not nn.Linear:
+                plain = nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+                plain.weight, plain.bias = child.weight, child.bias
+                setattr(parent, name, plain)
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def _load(size, int8=False):
+    import torch
+    import whisper
+    start = time.perf_counter()
+    torch.set_num_threads(WHISPER_THREADS)
+    model = whisper.load_model(size, device="cpu" if int8 else None)
+    model.eval()
+    if int8:
+        model = _quantize(model)
+    logger.info(f"Whisper '{size}'{' int8' if int8 else ''} loaded in {time.perf_counter() - start:.1f}s")
+    return model
+
+
+def get_model(size, int8=False):
+    """
+    Returns the Whisper model for size, loading it (or waiting for a running preload) on first use.
+    int8=True selects the dynamically quantised CPU variant (cached separately from the fp32 one).
+    """
+    key = (size, bool(int8))
+    with _lock:
+        model = _models.get(key)
+        if model is not None:
+            return model
+        event = _loading.get(key)
+        owner = event is None
+        if owner:
+            event = _loading[key] = threading.Event()
+
+    if not owner:
+        event.wait()
+        model = _models.get(key)
+        # A failed preload is retried here so the caller gets the real exception
+        return model if model is not None else get_model(size, int8)
+
+    try:
+        model = _load(size, int8)
+        _models[key] = model
+        return model
+    finally:
+        with _lock:
+            _loading.pop(key, None)
+        event.set()
+
+
+def preload(*sizes, int8=False):
+    """Loads the given sizes on a daemon thread (overlaps the weight load with network I/O). Returns the thread."""
+    def _run():
+        for size in sizes:
+            try:
+                get_model(size, int8)
+            except Exception as e:
+                logger.warning(f"Whisper '{size}' preload failed: {e}")
+
+    thread = threading.Thread(target=_run, name="whisper-preload", daemon=True)
+    thread.start()
+    return thread
@@ -1,8 +1,37 @@
 import os
+import re
 import logging
+from urllib.parse import urlparse, parse_qs
 
 logger = logging.getLogger(__name__)
 
+_VIDEO_ID = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+
+def extract_youtube_id(url):
+    """
+    Normalises any YouTube URL form (watch?v=, youtu.be/, shorts/, embed/, live/, m./music. hosts)
+    or a bare 11-character ID to the video ID. Returns None if no ID can be found.
+    """
+    if not url:
+        return None
+    url = url.strip()
+    if _VIDEO_ID.match(url):
+        return url
+    parsed = urlparse(url if "://" in url else f"https://{url}")
+    host = parsed.netloc.lower().split(":")[0]
+    candidate = None
+    if host.endswith("youtu.be"):
+        candidate = parsed.path.lstrip("/").split("/")[0]
+    elif host.endswith("youtube.com") or host.endswith("youtube-nocookie.com"):
+        candidate = parse_qs(parsed.query).get("v", [None])[0]
+        if not candidate:
+            parts = [p for p in parsed.path.split("/") if p]
+            if len(parts) >= 2 and parts[0] in ("shorts", "embed", "live", "v", "e"):
+                candidate = parts[1]
+    return candidate if candidate and _VIDEO_ID.match(candidate) else None
+
+
 def download_video(url, out_dir="temp"):
     """
     MANUAL REWRITE: yt-dlp downloading is disabled.